@@ -0,0 +1,70 @@
+from commands.command import Command
+from world.wod20th.splats import AFFILIATION_CATEGORIES, backfill_affiliation_tags, census, members
+
+
+class CmdCensus(Command):
+    """
+    Count characters by splat, clan, tribe or tradition
+
+    Usage:
+      +census [<category>]
+      +census/here [<category>]
+      +census/list <value>[ in <category>]
+      +census/reindex
+
+    <category> is one of splat (default), clan, tribe or tradition.
+    /here limits the count to your current room. /list names everyone
+    with the given value. /reindex adds the missing census Tags for
+    characters and NPCs set up before the census existed.
+
+    Examples:
+      +census
+      +census/here clan
+      +census/list Garou
+      +census/list Ventrue in clan
+    """
+
+    key = "+census"
+    locks = "cmd:perm(Builder)"
+    help_category = "Admin"
+
+    def parse(self):
+        switches = []
+        args = self.args
+        while args.startswith("/"):
+            switch, _, args = args[1:].partition(" ")
+            switches.append(switch.lower())
+        self.switches = switches
+        self.args = args.strip()
+
+    def func(self):
+        caller = self.caller
+
+        if "reindex" in self.switches:
+            count = backfill_affiliation_tags()
+            caller.msg(f"Census Tags checked for {count} objects.")
+            return
+
+        if "list" in self.switches:
+            value, _, category = self.args.partition(" in ")
+            category = category.strip().lower() or "splat"
+            if not value or category not in AFFILIATION_CATEGORIES:
+                caller.msg("Usage: +census/list <value>[ in <category>]")
+                return
+            location = caller.location if "here" in self.switches else None
+            names = sorted(obj.key for obj in members(value.strip(), category, location))
+            caller.msg(f"{len(names)} in {value.strip()}: {', '.join(names) or 'nobody'}")
+            return
+
+        category = self.args.lower() or "splat"
+        if category not in AFFILIATION_CATEGORIES:
+            caller.msg(f"Category must be one of {', '.join(AFFILIATION_CATEGORIES)}.")
+            return
+        location = caller.location if "here" in self.switches else None
+        counts = census(category, location)
+        if not counts:
+            caller.msg(f"Nobody has a {category} set.")
+            return
+        lines = [f"|wCensus by {category}{' (this room)' if location else ''}|n"]
+        lines.extend(f" {value:<30} {count:>5}" for value, count in counts)
+        caller.msg("\n".join(lines))
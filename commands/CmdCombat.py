@@ -0,0 +1,149 @@
+import re
+
+from commands.command import Command
+from typeclasses.combat import DAMAGE_TYPES, CombatScript
+
+
+class CmdCombat(Command):
+    """
+    Run a fight in the current room
+
+    Usage:
+      +combat                  - show initiative and declared actions
+      +combat/join             - join the fight here, starting it if needed
+      +combat/add <name>[, <name> ...]
+                               - add others to the fight (staff)
+      +combat/attack <target>=<attack pool>,<damage pool>[ vs <difficulty>][/<type>]
+                               - declare your attack for this round
+      +combat/resolve          - resolve the round (staff)
+      +combat/leave            - leave the fight
+      +combat/end              - end the fight (staff)
+
+    Every declared attack is resolved together when the round is
+    resolved. <type> is bashing (default), lethal or aggravated.
+
+    Examples:
+      +combat/attack Bob=Dexterity+Brawl,Strength
+      +combat/attack Bob=Dexterity+Melee,Strength+2 vs 7/lethal
+    """
+
+    key = "+combat"
+    locks = "cmd:all()"
+    help_category = "Combat"
+
+    attack_regex = re.compile(
+        r"^(?P<target>[^=]+)=(?P<attack>[^,]+),(?P<damage>.+?)"
+        r"(?:\s+vs\s+(?P<difficulty>\d+))?(?:/(?P<type>\w+))?$",
+        re.I,
+    )
+
+    def parse(self):
+        switches = []
+        args = self.args
+        while args.startswith("/"):
+            switch, _, args = args[1:].partition(" ")
+            switches.append(switch.lower())
+        self.switch = switches[0] if switches else ""
+        self.args = args.strip()
+
+    def get_combat(self, create=False):
+        location = self.caller.location
+        if not location:
+            return None
+        scripts = location.scripts.get("combat")
+        if scripts:
+            return scripts[0]
+        if create:
+            location.scripts.add(CombatScript, key="combat")
+            return location.scripts.get("combat")[0]
+        return None
+
+    def is_staff(self):
+        return self.caller.check_permstring("Builder")
+
+    def func(self):
+        caller = self.caller
+        switch = self.switch
+
+        if switch in ("add", "resolve", "end") and not self.is_staff():
+            caller.msg("Only staff can do that.")
+            return
+
+        if switch == "join":
+            combat = self.get_combat(create=True)
+            if not combat:
+                caller.msg("You are not in a room.")
+                return
+            try:
+                combat.add_combatants(caller)
+            except ValueError as err:
+                caller.msg(str(err))
+                return
+            caller.location.msg_contents(f"{caller.key} joins the fight.")
+            return
+
+        combat = self.get_combat()
+        if not combat:
+            caller.msg("There is no fight here.")
+            return
+
+        if switch == "add":
+            characters = []
+            for name in self.args.split(","):
+                found = caller.search(name.strip(), location=caller.location)
+                if not found:
+                    return
+                characters.append(found)
+            try:
+                combat.add_combatants(*characters)
+            except ValueError as err:
+                caller.msg(str(err))
+                return
+            caller.location.msg_contents(f"{', '.join(c.key for c in characters)} join the fight.")
+        elif switch == "attack":
+            self.declare(combat)
+        elif switch == "resolve":
+            caller.location.msg_contents("\n".join(combat.resolve_round()))
+        elif switch == "leave":
+            combat.remove_combatant(caller)
+            caller.location.msg_contents(f"{caller.key} leaves the fight.")
+        elif switch == "end":
+            combat.delete()
+            caller.location.msg_contents("The fight is over.")
+        elif not switch:
+            self.show(combat)
+        else:
+            caller.msg(f"Unknown switch /{switch}. See 'help +combat'.")
+
+    def declare(self, combat):
+        caller = self.caller
+        match = self.attack_regex.match(self.args)
+        if not match:
+            caller.msg("Usage: +combat/attack <target>=<attack pool>,<damage pool>[ vs <difficulty>][/<type>]")
+            return
+        target = caller.search(match.group("target").strip(), location=caller.location)
+        if not target:
+            return
+        damage_type = (match.group("type") or "bashing").lower()
+        if damage_type not in DAMAGE_TYPES:
+            caller.msg(f"Damage type must be one of {', '.join(DAMAGE_TYPES)}.")
+            return
+        difficulty = int(match.group("difficulty") or 6)
+        try:
+            combat.declare_attack(
+                caller, target, match.group("attack").strip(), match.group("damage").strip(),
+                difficulty, damage_type,
+            )
+        except ValueError as err:
+            caller.msg(str(err))
+            return
+        caller.msg(f"You will attack {target.key} this round.")
+
+    def show(self, combat):
+        declared = {action.attacker: action for action in combat.pending()}
+        lines = [f"|wFight in {self.caller.location.key}|n"]
+        for character, initiative in combat.initiative_order():
+            action = declared.get(character)
+            plan = f"attacks {action.target.key}" if action else "|xno action|n"
+            lines.append(f" {initiative:>3}  {character.key:<20} {plan}")
+        self.caller.msg("\n".join(lines))
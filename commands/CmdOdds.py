@@ -0,0 +1,67 @@
+import re
+
+from commands.command import Command
+from world.wod20th.dice import MAX_DIFFICULTY, MIN_DIFFICULTY
+from world.wod20th.odds import DIFFICULTIES, MAX_POOL, get_odds
+
+
+class CmdOdds(Command):
+    """
+    Show the odds of a dice roll
+
+    Usage:
+      +odds <pool>[ vs <difficulty>]
+      +odds/spec <pool>[ vs <difficulty>]
+
+    Shows the exact chance of success, failure and botch for a pool of
+    dice, and the average number of successes. Without a difficulty,
+    every difficulty from 2 to 10 is listed. The /spec switch counts
+    10s as two successes.
+
+    Examples:
+      +odds 7 vs 8
+      +odds/spec 5
+    """
+
+    key = "+odds"
+    locks = "cmd:all()"
+    help_category = "Dice"
+
+    def parse(self):
+        switches = []
+        args = self.args
+        while args.startswith("/"):
+            switch, _, args = args[1:].partition(" ")
+            switches.append(switch.lower())
+        self.switches = switches
+
+        parts = re.split(r"\s+vs\s+", args.strip(), maxsplit=1, flags=re.I)
+        self.pool = parts[0].strip()
+        self.difficulty = parts[1].strip() if len(parts) > 1 else ""
+
+    def func(self):
+        caller = self.caller
+        if not self.pool.isdigit() or (self.difficulty and not self.difficulty.isdigit()):
+            caller.msg("Usage: +odds <pool>[ vs <difficulty>]")
+            return
+
+        pool = int(self.pool)
+        if not 1 <= pool <= MAX_POOL:
+            caller.msg(f"The pool must be between 1 and {MAX_POOL} dice.")
+            return
+
+        if self.difficulty and not MIN_DIFFICULTY <= int(self.difficulty) <= MAX_DIFFICULTY:
+            caller.msg(f"The difficulty must be between {MIN_DIFFICULTY} and {MAX_DIFFICULTY}.")
+            return
+
+        specialty = "spec" in self.switches
+        difficulties = [int(self.difficulty)] if self.difficulty else list(DIFFICULTIES)
+
+        lines = [f"|wOdds for {pool} dice{' with a specialty' if specialty else ''}|n"]
+        lines.append(" Diff  Success  Failure   Botch   Avg")
+        for difficulty in difficulties:
+            success, failure, botch, expected = get_odds(pool, difficulty, specialty)
+            lines.append(
+                f" {difficulty:>4}  {success:>6.1%}  {failure:>6.1%}  {botch:>6.1%}  {expected:>4.2f}"
+            )
+        caller.msg("\n".join(lines))
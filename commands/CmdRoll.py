@@ -0,0 +1,115 @@
+import re
+
+from commands.command import Command
+from world.wod20th.dice import DICE, MAX_DIFFICULTY, MIN_DIFFICULTY, resolve_pool
+
+
+class CmdRoll(Command):
+    """
+    Roll a WoD20 dice pool
+
+    Usage:
+      +roll <pool>[ vs <difficulty>]
+      +roll/spec <pool>[ vs <difficulty>]
+      +roll/room <pool>[ vs <difficulty>]
+
+    <pool> is a number of dice or a sum of stats and numbers, such as
+    Dexterity+Brawl or Wits+Alertness-2. The difficulty defaults to 6.
+
+    Switches:
+      spec - 10s count as two successes (specialty).
+      room - roll the pool for every character in the room at once.
+             Staff only; meant for mass scenes.
+
+    Examples:
+      +roll 5
+      +roll Strength+Brawl vs 7
+      +roll/spec Manipulation+Subterfuge vs 8
+      +roll/room Dexterity+Athletics vs 6
+    """
+
+    key = "+roll"
+    aliases = ["roll"]
+    locks = "cmd:all()"
+    help_category = "Dice"
+
+    def parse(self):
+        switches = []
+        args = self.args
+        while args.startswith("/"):
+            switch, _, args = args[1:].partition(" ")
+            switches.append(switch.lower())
+        self.switches = switches
+
+        parts = re.split(r"\s+vs\s+", args.strip(), maxsplit=1, flags=re.I)
+        self.pool_expr = parts[0].strip()
+        self.difficulty = parts[1].strip() if len(parts) > 1 else ""
+
+    def func(self):
+        caller = self.caller
+        if not self.pool_expr:
+            caller.msg("Usage: +roll <pool>[ vs <difficulty>]")
+            return
+
+        difficulty = 6
+        if self.difficulty:
+            if not self.difficulty.isdigit():
+                caller.msg("The difficulty must be a number.")
+                return
+            difficulty = int(self.difficulty)
+            if not MIN_DIFFICULTY <= difficulty <= MAX_DIFFICULTY:
+                caller.msg(f"The difficulty must be between {MIN_DIFFICULTY} and {MAX_DIFFICULTY}.")
+                return
+
+        if "room" in self.switches:
+            if not caller.check_permstring("Builder"):
+                caller.msg("Only staff can roll for the whole room.")
+                return
+            if not caller.location:
+                caller.msg("You are not in a room.")
+                return
+            if hasattr(caller.location, "indexed_contents"):
+                candidates = caller.location.indexed_contents("characters")
+            else:
+                candidates = [obj for obj in caller.location.contents if obj.has_account]
+            rollers = [obj for obj in candidates if hasattr(obj, "get_stat")]
+        else:
+            rollers = [caller]
+
+        pools = []
+        for roller in rollers:
+            pool = resolve_pool(roller, self.pool_expr)
+            if pool is None:
+                if roller == caller:
+                    caller.msg(f"Could not resolve '{self.pool_expr}' from your stats.")
+                    return
+                pool = 0
+            pools.append(pool)
+
+        specialty = "spec" in self.switches
+        results = DICE.roll_pools(pools, difficulty, [specialty] * len(pools))
+
+        lines = [
+            self.format_result(roller, pool, difficulty, result)
+            for roller, pool, result in zip(rollers, pools, results)
+        ]
+        if caller.location:
+            caller.location.msg_contents("\n".join(lines))
+        else:
+            caller.msg("\n".join(lines))
+
+    def format_result(self, roller, pool, difficulty, result):
+        dice = " ".join(
+            f"|g{die}|n" if die >= difficulty else (f"|r{die}|n" if die == 1 else str(die))
+            for die in result.dice
+        )
+        if result.botch:
+            outcome = "|rBOTCH|n"
+        elif result.successes:
+            outcome = f"|g{result.successes} success{'es' if result.successes != 1 else ''}|n"
+        else:
+            outcome = "|yfailure|n"
+        return (
+            f"|w{roller.get_display_name(self.caller)}|n rolls {self.pool_expr} "
+            f"({pool} dice) vs {difficulty}: {outcome} ({dice or 'no dice'})"
+        )
@@ -0,0 +1,81 @@
+import re
+
+from commands.command import Command
+from world.wod20th.models import CharacterStat
+
+
+class CmdStatSearch(Command):
+    """
+    Find characters by stat value
+
+    Usage:
+      +statsearch <stat>[<op><value>][, <stat><op><value> ...]
+      +statsearch/reindex
+
+    Lists every character matching all of the given conditions. <op> is
+    one of >=, >, <=, < or =; a bare stat name means the character has
+    at least one dot in it.
+
+    The /reindex switch reloads the stat catalog from the database and
+    rebuilds the stat search table from every character's sheet, e.g.
+    after a stat import or after importing old characters.
+
+    Examples:
+      +statsearch Dominate>=3
+      +statsearch Resources >= 4, Generation <= 8
+      +statsearch Obfuscate
+    """
+
+    key = "+statsearch"
+    locks = "cmd:perm(Builder)"
+    help_category = "Admin"
+
+    condition_regex = re.compile(r"^\s*(?P<name>.+?)\s*(?:(?P<op>>=|<=|>|<|=)\s*(?P<value>-?\d+))?\s*$")
+
+    def parse(self):
+        switches = []
+        args = self.args
+        while args.startswith("/"):
+            switch, _, args = args[1:].partition(" ")
+            switches.append(switch.lower())
+        self.switches = switches
+        self.args = args.strip()
+
+    def func(self):
+        if "reindex" in self.switches:
+            self.reindex()
+            return
+
+        if not self.args:
+            self.caller.msg("Usage: +statsearch <stat>[<op><value>][, <stat><op><value> ...]")
+            return
+
+        matches = None
+        for condition in self.args.split(","):
+            match = self.condition_regex.match(condition)
+            if not match:
+                self.caller.msg(f"Could not understand condition '{condition.strip()}'.")
+                return
+            op = match.group("op") or ">="
+            value = int(match.group("value")) if match.group("value") else 1
+            matches = CharacterStat.objects.characters_with(match.group("name"), op, value, queryset=matches)
+
+        names = sorted(obj.key for obj in matches)
+        if not names:
+            self.caller.msg("No characters match.")
+            return
+        self.caller.msg(f"{len(names)} character(s) match: {', '.join(names)}")
+
+    def reindex(self):
+        from typeclasses.characters import Character
+        from world.wod20th.catalog import STAT_CATALOG
+
+        # stats imported, edited or pruned by load_wod20th_stats run in
+        # another process, so this process never saw their signals
+        STAT_CATALOG.load()
+        count = 0
+        for character in Character.objects.all_family():
+            character.stats.flush()
+            CharacterStat.objects.rebuild_character(character, character.stats.all())
+            count += 1
+        self.caller.msg(f"Reloaded {len(STAT_CATALOG)} stats and rebuilt the stat search table for {count} character(s).")
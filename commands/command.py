@@ -6,6 +6,7 @@ Commands describe the input the account can do to the game.
 """
 
 from evennia.commands.command import Command as BaseCommand
+from world.wod20th.handlers import StatHandler
 
 # from evennia import default_cmds
 
@@ -30,7 +31,14 @@ class Command(BaseCommand):
     #     - at_post_cmd(): Extra actions, often things done after
     #         every command, like prompts.
     #
-    pass
+
+    def at_post_cmd(self):
+        """
+        Write any stat changes made by the command in a single save.
+        """
+        stats = getattr(self.caller, "stats", None)
+        if isinstance(stats, StatHandler):
+            stats.flush()
 
 
 # -------------------------------------------------------------
@@ -16,6 +16,11 @@ own cmdsets by inheriting from them or directly from `evennia.CmdSet`.
 
 from evennia import default_cmds
 from commands.CmdGradient import CmdGradientName
+from commands.CmdStatSearch import CmdStatSearch
+from commands.CmdRoll import CmdRoll
+from commands.CmdOdds import CmdOdds
+from commands.CmdCombat import CmdCombat
+from commands.CmdCensus import CmdCensus
 
 
 class CharacterCmdSet(default_cmds.CharacterCmdSet):
@@ -36,6 +41,11 @@ class CharacterCmdSet(default_cmds.CharacterCmdSet):
         # any commands you add below will overload the default ones.
         #
         self.add(CmdGradientName())
+        self.add(CmdStatSearch())
+        self.add(CmdRoll())
+        self.add(CmdOdds())
+        self.add(CmdCombat())
+        self.add(CmdCensus())
 
 
 class AccountCmdSet(default_cmds.AccountCmdSet):
@@ -30,7 +30,20 @@ def at_server_start():
     This is called every time the server starts up, regardless of
     how it was shut down.
     """
-    pass
+    import os
+    from django.conf import settings
+    from evennia.utils import logger
+    from world.wod20th.odds import load_tables
+    from world.wod20th.snapshot import load_catalog_snapshot
+
+    if load_catalog_snapshot():
+        logger.log_info("Stat catalog loaded from snapshot.")
+    else:
+        logger.log_info("No current stat snapshot; stat catalog will load from the database.")
+
+    load_tables(
+        getattr(settings, "WOD20TH_ODDS_CACHE", os.path.join(settings.GAME_DIR, "server", "dice_odds.json"))
+    )
 
 
 def at_server_stop():
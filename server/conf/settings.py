@@ -40,6 +40,15 @@ WEBSOCKET_CLIENT_PORT = 4202
 
 INSTALLED_APPS += ["world.wod20th"]  # Add your app to the list of installed apps
 BASE_ROOM_TYPECLASS = "typeclasses.rooms.RoomParent"
+# One scheduler for all timed per-character effects (see typeclasses/scheduler.py)
+GLOBAL_SCRIPTS = {
+    "scheduler": {
+        "typeclass": "typeclasses.scheduler.SchedulerScript",
+        "interval": 1,
+        "persistent": True,
+        "desc": "Runs timed and recurring game events",
+    },
+}
   # Change 8001 to your desired websocket port
 ######################################################################
 # Settings given in secret_settings.py override those in this file.
@@ -1,16 +1,57 @@
 # typeclasses/characters.py
 from evennia import DefaultCharacter
 from evennia.utils.ansi import ANSIString
+from evennia.utils.utils import lazy_property
+from world.wod20th.handlers import StatHandler
+from world.wod20th.splats import set_affiliation, sync_affiliation_tags
+from world.wod20th.utils import gradient
 
 class Character(DefaultCharacter):
+    @lazy_property
+    def stats(self):
+        return StatHandler(self)
+
     def get_display_name(self, looker, **kwargs):
         """
         Get the name to display for the character.
         """
-        if self.db.gradient_name:
-            return ANSIString(self.db.gradient_name)
+        name = self.get_gradient_name(gradient.client_mode(looker) if looker else "xterm256")
+        if name:
+            return name
         return super().get_display_name(looker, **kwargs)
 
+    def set_gradient(self, text, stops):
+        """
+        Give the character a gradient name.
+
+        Args:
+            text (str): The name to color.
+            stops (list): (r, g, b) color stops, at least one.
+        """
+        self.db.gradient = {"text": text, "stops": [tuple(stop) for stop in stops]}
+        self.attributes.remove("gradient_name")
+        self.ndb.gradient_cache = None
+
+    def get_gradient_name(self, mode="xterm256"):
+        """
+        The gradient name rendered for one of gradient.MODES, or None if
+        the character has no gradient. Renders are cached per mode.
+        """
+        cache = self.ndb.gradient_cache
+        if cache is None:
+            cache = self.ndb.gradient_cache = {}
+        if mode not in cache:
+            data = self.db.gradient
+            if data:
+                cache[mode] = gradient.render(data["text"], data["stops"], mode)
+            elif self.db.gradient_name:
+                # names set before gradients were stored as data
+                legacy = self.db.gradient_name
+                cache[mode] = str(ANSIString(legacy).clean()) if mode == "plain" else legacy
+            else:
+                cache[mode] = None
+        return cache[mode]
+
     def at_say(self, message, msg_self=None, msg_location=None, receivers=None, msg_receivers=None, **kwargs):
             """
             Override the default say method to use the gradient name.
@@ -21,8 +62,8 @@ class Character(DefaultCharacter):
             if msg_self is None:
                 msg_self = f"You say: {message}"
             if msg_location is None:
-                if self.db.gradient_name:
-                    gradient_name = ANSIString(self.db.gradient_name)
+                gradient_name = self.get_gradient_name()
+                if gradient_name:
                     msg_location = f"{gradient_name} says: {message}"
                 else:
                     msg_location = f"{self.name} says: {message}"
@@ -31,19 +72,69 @@ class Character(DefaultCharacter):
                         receivers=receivers, msg_receivers=msg_receivers, **kwargs)
 
     def get_stat(self, stat_name):
-        if not hasattr(self.db, "stats"):
-            return None
-        return self.db.stats.get(stat_name, None)
+        return self.stats.get(stat_name)
     
     def set_stat(self, stat_name, value):
-        if not hasattr(self.db, "stats"):
-            self.db.stats = {}
-        self.db.stats[stat_name] = value
+        """
+        Set a stat if the stat's lock_string allows this character to
+        edit it.
+
+        Returns:
+            bool: False if the stat's lock denied the change or the stat
+                is derived from other stats.
+        """
+        if not self.can_edit_stat(stat_name):
+            return False
+        return self.stats.set(stat_name, value)
+
+    def can_edit_stat(self, stat_name):
+        from world.wod20th.catalog import STAT_CATALOG
+        stat = STAT_CATALOG.get(stat_name)
+        return stat is None or stat.access(self, "edit")
+
+    def set_splat(self, splat):
+        """
+        Set the character's splat. Use this rather than assigning
+        db.splat so the splat Tag and cached lock results stay current.
+        """
+        self.set_affiliation("splat", splat)
+
+    def set_affiliation(self, category, value):
+        """
+        Set splat, clan, tribe or tradition (see world.wod20th.splats).
+        """
+        set_affiliation(self, category, value)
+        self.stats.bump_version()
+
+    def at_post_puppet(self, **kwargs):
+        super().at_post_puppet(**kwargs)
+        sync_affiliation_tags(self)
+        self._update_contents_index(self.location)
+
+    def at_post_unpuppet(self, account=None, session=None, **kwargs):
+        location = self.location
+        super().at_post_unpuppet(account=account, session=session, **kwargs)
+        # the default hook may stow us away without a move, so tell the old
+        # room as well as the current one
+        self._update_contents_index(location, self.location)
+
+    def _update_contents_index(self, *locations):
+        for location in set(locations):
+            if hasattr(location, "update_contents_index"):
+                location.update_contents_index(self)
+
+    def at_server_reload(self):
+        super().at_server_reload()
+        self.stats.flush()
+
+    def at_server_shutdown(self):
+        super().at_server_shutdown()
+        self.stats.flush()
     
     def check_stat_value(self, stat_name, value):
-        from world.wod20th.models import Stat  
-        stat = Stat.objects.filter(name=stat_name).first()
-        if stat and (value in stat.values):
+        from world.wod20th.catalog import STAT_CATALOG
+        stat = STAT_CATALOG.get(stat_name)
+        if stat and stat.is_valid_value(value):
             return True
         return False
 
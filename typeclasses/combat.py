@@ -0,0 +1,215 @@
+"""
+Combat
+
+A combat tracker Script, attached to the room where a fight happens.
+
+Combatants and their declared actions are kept in memory for the
+duration of a round. `resolve_round` then settles every action in one
+pass: all attack rolls are made in one batched dice call, then all
+damage rolls, then all soak rolls. The resulting damage is written with
+one stat write per affected character, not one per hit, and all of a
+round's writes are committed in one transaction.
+
+Damage is tracked in the "Bashing Damage", "Lethal Damage" and
+"Aggravated Damage" stats; a character with no "Health Levels" left is
+incapacitated.
+
+"""
+
+from django.db import transaction
+
+from world.wod20th.dice import DICE, MAX_DIFFICULTY, MIN_DIFFICULTY, resolve_pool
+from world.wod20th.splats import has_affiliation
+
+from typeclasses.scripts import Script
+
+DAMAGE_TYPES = ("bashing", "lethal", "aggravated")
+DAMAGE_STATS = {damage_type: f"{damage_type.capitalize()} Damage" for damage_type in DAMAGE_TYPES}
+
+
+class Action:
+    """
+    One declared attack.
+    """
+
+    __slots__ = ("attacker", "target", "attack_pool", "damage_pool", "difficulty", "damage_type")
+
+    def __init__(self, attacker, target, attack_pool, damage_pool, difficulty=6, damage_type="bashing"):
+        self.attacker = attacker
+        self.target = target
+        self.attack_pool = attack_pool
+        self.damage_pool = damage_pool
+        self.difficulty = difficulty
+        self.damage_type = damage_type
+
+
+class CombatScript(Script):
+    """
+    Tracks initiative and pending actions for a fight in one room.
+
+    Create with `room.scripts.add(CombatScript)`; the room is `self.obj`.
+    """
+
+    def at_script_creation(self):
+        self.key = "combat"
+        self.desc = "Tracks a fight in this room"
+        self.persistent = False
+        self.db.round = 0
+
+    def at_start(self, **kwargs):
+        self._ensure_state()
+
+    def _ensure_state(self):
+        if self.ndb.combatants is None:
+            self.ndb.combatants = []
+            self.ndb.initiative = {}
+            self.ndb.actions = {}
+
+    # roster
+
+    def add_combatants(self, *characters):
+        """
+        Add characters to the fight, rolling initiative for all of them
+        in one batch (d10 + Initiative Rating).
+
+        Raises:
+            ValueError: If any of them has no stats to fight with.
+        """
+        self._ensure_state()
+        unfit = [obj.key for obj in characters if not (hasattr(obj, "get_stat") and hasattr(obj, "stats"))]
+        if unfit:
+            raise ValueError(f"{', '.join(unfit)} can't fight.")
+        new = [char for char in characters if char not in self.ndb.combatants]
+        if not new:
+            return
+        rolls = DICE.roll_pools([1] * len(new), 6)
+        for character, roll in zip(new, rolls):
+            self.ndb.combatants.append(character)
+            self.ndb.initiative[character] = roll.dice[0] + (character.get_stat("Initiative Rating") or 0)
+        self._sort()
+
+    def remove_combatant(self, character):
+        self._ensure_state()
+        if character in self.ndb.combatants:
+            self.ndb.combatants.remove(character)
+        self.ndb.initiative.pop(character, None)
+        self.ndb.actions.pop(character, None)
+        if not self.ndb.combatants:
+            self.delete()
+
+    def _sort(self):
+        initiative = self.ndb.initiative
+        self.ndb.combatants.sort(key=lambda char: initiative.get(char, 0), reverse=True)
+
+    def initiative_order(self):
+        self._ensure_state()
+        return [(char, self.ndb.initiative.get(char, 0)) for char in self.ndb.combatants]
+
+    # actions
+
+    def declare_attack(self, attacker, target, attack_pool, damage_pool, difficulty=6, damage_type="bashing"):
+        """
+        Queue an attack for the current round. A later declaration by the
+        same attacker replaces the earlier one.
+
+        Args:
+            attacker, target (Character): Both must be in the fight.
+            attack_pool (str): Pool expression, e.g. "Dexterity+Brawl".
+            damage_pool (str): Pool expression, e.g. "Strength+1".
+            difficulty (int): Attack difficulty.
+            damage_type (str): One of DAMAGE_TYPES.
+        """
+        self._ensure_state()
+        if attacker not in self.ndb.combatants or target not in self.ndb.combatants:
+            raise ValueError("Both attacker and target must be in the fight.")
+        if damage_type not in DAMAGE_TYPES:
+            raise ValueError(f"Damage type must be one of {', '.join(DAMAGE_TYPES)}.")
+        if not MIN_DIFFICULTY <= difficulty <= MAX_DIFFICULTY:
+            raise ValueError(f"The difficulty must be between {MIN_DIFFICULTY} and {MAX_DIFFICULTY}.")
+        self.ndb.actions[attacker] = Action(attacker, target, attack_pool, damage_pool, difficulty, damage_type)
+
+    def pending(self):
+        self._ensure_state()
+        return list(self.ndb.actions.values())
+
+    # resolution
+
+    def resolve_round(self):
+        """
+        Resolve every declared action at once and apply the damage.
+
+        Returns:
+            list of str: Report lines, in initiative order.
+        """
+        self._ensure_state()
+        combatants = self.ndb.combatants
+        actions = [self.ndb.actions[char] for char in combatants if char in self.ndb.actions]
+        self.ndb.actions = {}
+        self.db.round = (self.db.round or 0) + 1
+        report = [f"|wRound {self.db.round}|n"]
+        if not actions:
+            report.append("No actions were declared.")
+            return report
+
+        # 1. all attack rolls
+        attacks = DICE.roll_pools(
+            [resolve_pool(action.attacker, action.attack_pool) or 0 for action in actions],
+            [action.difficulty for action in actions],
+        )
+
+        # 2. damage rolls for every hit; extra attack successes add dice
+        hits = [(action, attack) for action, attack in zip(actions, attacks) if attack.successes]
+        damage = DICE.roll_pools(
+            [(resolve_pool(action.attacker, action.damage_pool) or 0) + attack.successes - 1 for action, attack in hits],
+            6,
+        )
+
+        # 3. soak rolls; lethal damage is only soakable by vampires, aggravated by nobody
+        soak_pools = [self._soak_pool(action.target, action.damage_type) for action, _ in hits]
+        soaks = DICE.roll_pools(soak_pools, 6)
+
+        wounds = {}
+        hit_rolls = iter(zip(damage, soaks))
+        for action, attack in zip(actions, attacks):
+            if not attack.successes:
+                verb = "botches an attack on" if attack.botch else "misses"
+                report.append(f"{action.attacker.key} {verb} {action.target.key}.")
+                continue
+            damage_roll, soak_roll = next(hit_rolls)
+            levels = max(0, damage_roll.successes - soak_roll.successes)
+            if levels:
+                target_wounds = wounds.setdefault(action.target, dict.fromkeys(DAMAGE_TYPES, 0))
+                target_wounds[action.damage_type] += levels
+            report.append(
+                f"{action.attacker.key} hits {action.target.key} "
+                f"({attack.successes} successes) for {levels} {action.damage_type}."
+            )
+
+        # one stat write per wounded character, and the round's damage
+        # lands together or not at all
+        try:
+            with transaction.atomic():
+                for character, taken in wounds.items():
+                    character.stats.set_many({
+                        DAMAGE_STATS[damage_type]: (character.get_stat(DAMAGE_STATS[damage_type]) or 0) + levels
+                        for damage_type, levels in taken.items() if levels
+                    })
+                    character.stats.flush()
+        except Exception:
+            # nothing was saved, so drop the damage held in memory too
+            for character in wounds:
+                character.attributes.reset_cache()
+                character.stats.reset()
+            raise
+        for character in wounds:
+            if not character.get_stat("Health Levels"):
+                report.append(f"|r{character.key} is incapacitated.|n")
+
+        return report
+
+    def _soak_pool(self, character, damage_type):
+        if damage_type == "aggravated":
+            return 0
+        if damage_type == "lethal" and not has_affiliation(character, "Vampire"):
+            return 0
+        return character.get_stat("Soak Pool") or 0
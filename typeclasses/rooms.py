@@ -1,73 +1,222 @@
 # typeclasses/rooms.py
 from evennia import DefaultRoom
 from evennia.utils.ansi import ANSIString
-from world.wod20th.utils.ansi_utils import wrap_ansi
+from world.wod20th.utils.ansi_utils import divider, header, wrap_ansi
+from world.wod20th.utils.gradient import MODES, client_mode
+from world.wod20th.utils.prefetch import prefetch_attributes
+
+# Attributes read off every character on a look, loaded in one query
+LOOK_ATTRIBUTES = ("shortdesc", "gradient", "gradient_name")
 
 class RoomParent(DefaultRoom):
+    """
+    The room keeps its contents sorted into characters, exits and
+    objects (see `indexed_contents`), so looks and listings don't filter
+    every object each time.
+
+    The room look is rendered from cached sections. The header,
+    wrapped description, exits and objects are built once per viewer
+    class (builders see dbrefs, players don't) and kept in ndb until the
+    room's name, desc or contents change. Character rows are cached per
+    character until their name or shortdesc changes; only the idle
+    column is computed on every look.
+    """
+
+    CONTENT_CATEGORIES = ("characters", "exits", "objects")
+
+    def at_object_receive(self, moved_obj, source_location, move_type="move", **kwargs):
+        super().at_object_receive(moved_obj, source_location, move_type=move_type, **kwargs)
+        self.update_contents_index(moved_obj)
+
+    def at_object_leave(self, moved_obj, target_location, move_type="move", **kwargs):
+        super().at_object_leave(moved_obj, target_location, move_type=move_type, **kwargs)
+        self.update_contents_index(moved_obj)
+
+    def invalidate_appearance(self):
+        """
+        Drop the cached look output, e.g. after a change the cache
+        doesn't notice on its own.
+        """
+        self.ndb.appearance_cache = None
+
+    # contents index: characters (puppeted), exits and other objects,
+    # kept in ndb and updated as things come, go, log in and log out
+
+    def indexed_contents(self, category):
+        """
+        The room's contents in one category, without filtering them.
+
+        Args:
+            category (str): "characters" (objects with an account
+                attached), "exits" or "objects".
+
+        Returns:
+            list: The objects, in the order they arrived.
+        """
+        return list(self._contents_index()[category])
+
+    def update_contents_index(self, obj):
+        """
+        Re-file `obj` after it arrived, left, or was puppeted or
+        unpuppeted.
+        """
+        index = self.ndb.contents_index
+        if index is None:
+            # built on the next read
+            return
+        previous = None
+        for category, members in index.items():
+            if members.pop(obj, False) is None:
+                previous = category
+        current = None
+        if obj.location == self:
+            current = self._categorize(obj)
+            index[current][obj] = None
+        if "exits" in (previous, current) or "objects" in (previous, current):
+            self.invalidate_appearance()
+        elif previous == "characters" and current != "characters":
+            self._forget_rows(obj)
+
+    def _forget_rows(self, character):
+        # the look's row cache would otherwise hold on to everyone who
+        # ever passed through
+        for cached in (self.ndb.appearance_cache or {}).values():
+            for key in [key for key in cached["rows"] if key[0] == character]:
+                del cached["rows"][key]
+
+    def _contents_index(self):
+        index = self.ndb.contents_index
+        # objects created in place or deleted don't fire receive/leave,
+        # so a size mismatch triggers a rebuild too
+        if index is None or sum(len(members) for members in index.values()) != len(self.contents):
+            index = self.ndb.contents_index = {category: {} for category in self.CONTENT_CATEGORIES}
+            for obj in self.contents:
+                index[self._categorize(obj)][obj] = None
+        return index
+
+    @staticmethod
+    def _categorize(obj):
+        if obj.has_account:
+            return "characters"
+        if obj.destination:
+            return "exits"
+        return "objects"
 
     def return_appearance(self, looker, **kwargs):
         if not looker:
             return ""
 
-        name = self.get_display_name(looker, **kwargs)
-        desc = self.db.desc
-
-        # Header with room name
         # if the looker is a builder, show the dbref
-        if looker.check_permstring("builders"):
-            string = ANSIString.center(ANSIString(f"|y {name}({self.dbref})|n "), width=78, fillchar=ANSIString("|b=|n")) + "\n"
-        else:
-            string = ANSIString.center(ANSIString(f"|y {name} |n"), width=78, fillchar=ANSIString("|b=|n")) + "\n"
-        
-        # Optional: add custom room description here if available
-        if desc:
-            string += wrap_ansi(desc, 78) + "\n"
+        builder = looker.check_permstring("builders")
+        cached = self._cached_appearance(looker, builder, **kwargs)
+
+        string = cached["header"] + cached["desc"]
 
         # List all characters in the room
-        characters = [obj for obj in self.contents if obj.has_account]
+        characters = self.indexed_contents("characters")
         if characters:
-            string += ANSIString.center(ANSIString("|y Characters |n"), width=78, fillchar=ANSIString("|b=|n")) + "\n"
+            string += cached["characters_banner"]
+            rows = cached["rows"]
+            mode = client_mode(looker)
+            prefetch_attributes(characters, LOOK_ATTRIBUTES)
             for character in characters:
                 idle_time = self.idle_time_display(character.idle_time)
                 # if the looker is the character itself the idle time is 0s.
                 if character == looker:
                     idle_time = self.idle_time_display(0)
 
+                # the name is rendered for the looker's client, so rows are
+                # cached per color mode
+                stamp = (character.key, character.db.gradient, character.db.gradient_name, character.db.shortdesc)
+                row = rows.get((character, mode))
+                if row is None or row[0] != stamp:
+                    row = rows[character, mode] = (stamp,) + self._character_row(character, looker)
+                string += f"{row[1]} {idle_time.rjust(5)} {row[2]}"
+            # catch rows left behind by characters that were deleted in place
+            if len(rows) > len(MODES) * len(characters):
+                present = set(characters)
+                for key in [key for key in rows if key[0] not in present]:
+                    del rows[key]
 
-                # Check for short description
-                shortdesc = character.db.shortdesc
-                if shortdesc:
-                    shortdesc_str = f"{shortdesc}"
-                else:
-                    shortdesc_str = ANSIString("|h|xType '|n+shortdesc <desc>|h|x' to set a short description.|n")
+        return string + cached["footer"]
 
-                # Calculate the total length and truncate if necessary and end with elipses.
-                # only replace the last three characters if the string is longer than 50 characters
-                if len(shortdesc_str) > 52:
-                    shortdesc_str = shortdesc_str[:52]
-                    shortdesc_str = shortdesc_str[:-3] + "..."
-                else:
-                    shortdesc_str = shortdesc_str.ljust(52, ' ')
-                
-                string += f" {character.get_display_name(looker).ljust(20)} {idle_time.rjust(5)} |n{shortdesc_str}\n"
+    def _cached_appearance(self, looker, builder, **kwargs):
+        """
+        The static parts of the look for this viewer class, rebuilt when
+        the room's name, desc or contents (or their names) have changed.
+        """
+        cache = self.ndb.appearance_cache
+        if cache is None:
+            cache = self.ndb.appearance_cache = {}
+        exits = self.indexed_contents("exits")
+        objects = self.indexed_contents("objects")
 
+        stamp = (
+            self.key,
+            self.db.desc,
+            tuple((ex.key, getattr(ex.destination, "key", None)) for ex in exits),
+            tuple(obj.key for obj in objects),
+        )
+        cached = cache.get(builder)
+        if cached is not None and cached["stamp"] == stamp:
+            return cached
+
+        name = self.get_display_name(looker, **kwargs)
+        desc = self.db.desc
+
+        # Header with room name
+        if builder:
+            title = header(f"|y {name}({self.dbref})|n ")
+        else:
+            title = header(f"|y {name} |n")
+
+        footer = ""
         # List all exits
-        exits = [ex for ex in self.contents if ex.destination]
         if exits:
-            string += "\n|wExits|n\n"
+            footer += "\n|wExits|n\n"
             for exit in exits:
-                string += f"  {exit.get_display_name(looker)} - leads to {exit.destination.get_display_name(looker)}\n"
+                footer += f"  {exit.get_display_name(looker)} - leads to {exit.destination.get_display_name(looker)}\n"
 
         # List all objects in the room
-        objects = [obj for obj in self.contents if not obj.has_account and not obj.destination]
         if objects:
-            string += "\n|wObjects|n\n"
+            footer += "\n|wObjects|n\n"
             for obj in objects:
-                string += f"  {obj.get_display_name(looker)}\n"
+                footer += f"  {obj.get_display_name(looker)}\n"
+
+        footer += divider()
+
+        cached = cache[builder] = {
+            "stamp": stamp,
+            "header": str(title) + "\n",
+            # Optional: add custom room description here if available
+            "desc": wrap_ansi(desc, 78) + "\n" if desc else "",
+            "characters_banner": str(header("|y Characters |n")) + "\n",
+            "rows": {},
+            "footer": str(footer),
+        }
+        return cached
+
+    def _character_row(self, character, looker):
+        """
+        The name and shortdesc parts of a character's line.
+        """
+        # Check for short description
+        shortdesc = character.db.shortdesc
+        if shortdesc:
+            shortdesc_str = ANSIString(shortdesc)
+        else:
+            shortdesc_str = ANSIString("|h|xType '|n+shortdesc <desc>|h|x' to set a short description.|n")
 
-        string += ANSIString("|b" + "="*78 + "|n")
+        # Calculate the total length and truncate if necessary and end with elipses.
+        # only replace the last three characters if the string is longer than 50 characters
+        if len(shortdesc_str) > 52:
+            shortdesc_str = shortdesc_str[:52]
+            shortdesc_str = shortdesc_str[:-3] + "..."
+        else:
+            shortdesc_str = shortdesc_str.ljust(52, ' ')
 
-        return string
+        name = ANSIString(character.get_display_name(looker))
+        return f" {name.ljust(20)}", f"|n{shortdesc_str}\n"
 
     def idle_time_display(self, idle_time):
         """
@@ -92,6 +241,6 @@ class RoomParent(DefaultRoom):
             color = "|r"  # red
         else:
             color = "|h|x"
-        
 
-        return f"{color}{time_str}|n"
+
+        return f"{color}{time_str}|n"
\ No newline at end of file
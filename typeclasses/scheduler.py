@@ -0,0 +1,208 @@
+"""
+Scheduler
+
+A single global Script that runs timed and recurring game events, such
+as willpower refresh or experience accrual, for every character. This
+avoids one ticking Script per character.
+
+Pending events are kept in an in-memory heap ordered by due time. Each
+tick pops everything that is due and runs it as one batch. Every event
+is saved as two small Attributes keyed by its id: its definition, written
+once when it is scheduled, and its next fire time, which is the only
+thing rewritten when it fires or is rescheduled. Scheduling, cancelling
+or firing an event therefore costs the same however many events are
+pending. After a reload the heap is rebuilt from the saved fire times.
+
+The Script is created through settings.GLOBAL_SCRIPTS:
+
+    from evennia import GLOBAL_SCRIPTS
+    event_id = GLOBAL_SCRIPTS.scheduler.schedule(
+        "world.wod20th.effects.refresh_willpower", 3600, obj=character, interval=86400)
+
+"""
+
+import heapq
+import time
+
+from evennia.utils import logger
+from evennia.utils.utils import variable_from_module
+
+from typeclasses.scripts import Script
+
+
+class SchedulerScript(Script):
+    """
+    Heap-backed scheduler for one-shot and recurring events.
+
+    In memory, each event is kept in `ndb.events` as
+
+        event_id: (fire_at, interval, callback_path, obj, kwargs)
+
+    and, when due, calls `callback(obj, **kwargs)`. `interval` is None
+    for one-shot events. On disk, the definition
+    (interval, callback_path, obj, kwargs) is stored in category
+    EVENT_CATEGORY and the fire time in FIRE_CATEGORY, both under
+    str(event_id).
+    """
+
+    EVENT_CATEGORY = "scheduler_event"
+    FIRE_CATEGORY = "scheduler_fire"
+
+    def at_script_creation(self):
+        self.desc = "Runs timed and recurring game events"
+        self.interval = 1
+        self.persistent = True
+        self.db.next_id = 1
+
+    def at_start(self, **kwargs):
+        self._rebuild_queue()
+
+    # runtime state, kept in ndb and rebuilt lazily after a reload
+
+    def _ensure_queue(self):
+        if self.ndb.queue is None:
+            self._rebuild_queue()
+        return self.ndb.queue
+
+    def _rebuild_queue(self):
+        fire_times = {attr.key: attr.value for attr in self.attributes.all(category=self.FIRE_CATEGORY)}
+        events = {}
+        for attr in self.attributes.all(category=self.EVENT_CATEGORY):
+            if attr.key in fire_times:
+                events[int(attr.key)] = (fire_times[attr.key],) + tuple(attr.value)
+        self.ndb.events = events
+        self.ndb.queue = [(event[0], event_id) for event_id, event in self.ndb.events.items()]
+        heapq.heapify(self.ndb.queue)
+        self.ndb.callbacks = {}
+        if self.ndb.metrics is None:
+            self.ndb.metrics = {"fired": 0, "errors": 0, "last_batch": 0, "last_lag": 0.0, "max_lag": 0.0}
+
+    def _save_event(self, event_id, fire_at, interval, callback, obj, kwargs):
+        self.attributes.add(str(event_id), (interval, callback, obj, kwargs), category=self.EVENT_CATEGORY)
+        self._save_fire_time(event_id, fire_at)
+
+    def _save_fire_time(self, event_id, fire_at):
+        self.attributes.add(str(event_id), fire_at, category=self.FIRE_CATEGORY)
+
+    def _delete_event(self, event_id):
+        self.attributes.remove(str(event_id), category=self.EVENT_CATEGORY)
+        self.attributes.remove(str(event_id), category=self.FIRE_CATEGORY)
+
+    # public API
+
+    def schedule(self, callback, delay, obj=None, interval=None, **kwargs):
+        """
+        Schedule `callback(obj, **kwargs)` to run in `delay` seconds.
+
+        Args:
+            callback (str): Python path to the callable, e.g.
+                "world.wod20th.effects.refresh_willpower". Paths rather
+                than callables are stored so events survive a reload.
+            delay (float): Seconds until the first run.
+            obj (Object, optional): Passed as the first argument.
+            interval (float, optional): Repeat every `interval` seconds.
+            **kwargs: Extra keyword arguments; must be picklable.
+
+        Returns:
+            int: The event id, for cancel() and reschedule().
+        """
+        self._ensure_queue()
+        event_id = self.db.next_id
+        self.db.next_id = event_id + 1
+        fire_at = time.time() + delay
+        self.ndb.events[event_id] = (fire_at, interval, callback, obj, kwargs)
+        heapq.heappush(self.ndb.queue, (fire_at, event_id))
+        self._save_event(event_id, fire_at, interval, callback, obj, kwargs)
+        return event_id
+
+    def cancel(self, event_id):
+        """
+        Cancel an event. Returns True if it was pending.
+        """
+        self._ensure_queue()
+        if self.ndb.events.pop(event_id, None) is None:
+            return False
+        # the heap entry is discarded lazily when it comes up
+        self._delete_event(event_id)
+        return True
+
+    def reschedule(self, event_id, delay):
+        """
+        Move an event to fire `delay` seconds from now. Returns True if
+        the event exists.
+        """
+        self._ensure_queue()
+        event = self.ndb.events.get(event_id)
+        if event is None:
+            return False
+        fire_at = time.time() + delay
+        self.ndb.events[event_id] = (fire_at,) + event[1:]
+        heapq.heappush(self.ndb.queue, (fire_at, event_id))
+        self._save_fire_time(event_id, fire_at)
+        return True
+
+    def metrics(self):
+        """
+        Queue depth and lag figures for monitoring.
+        """
+        queue = self._ensure_queue()
+        metrics = dict(self.ndb.metrics)
+        metrics["depth"] = len(self.ndb.events)
+        metrics["heap_size"] = len(queue)
+        metrics["next_due_in"] = max(0.0, queue[0][0] - time.time()) if queue else None
+        return metrics
+
+    # ticking
+
+    def _resolve(self, path):
+        callbacks = self.ndb.callbacks
+        if path not in callbacks:
+            module, _, name = path.rpartition(".")
+            callbacks[path] = variable_from_module(module, name)
+        return callbacks[path]
+
+    def at_repeat(self, **kwargs):
+        queue = self._ensure_queue()
+        events = self.ndb.events
+        now = time.time()
+        due = []
+        while queue and queue[0][0] <= now:
+            fire_at, event_id = heapq.heappop(queue)
+            event = events.get(event_id)
+            # skip entries left behind by cancel() or reschedule()
+            if event is None or event[0] != fire_at:
+                continue
+            due.append((event_id, event))
+
+        if not due:
+            return
+
+        metrics = self.ndb.metrics
+        lag = now - due[0][1][0]
+        metrics["last_lag"] = lag
+        metrics["max_lag"] = max(metrics["max_lag"], lag)
+        metrics["last_batch"] = len(due)
+
+        for event_id, (fire_at, interval, callback, obj, event_kwargs) in due:
+            try:
+                self._resolve(callback)(obj, **event_kwargs)
+            except Exception:
+                metrics["errors"] += 1
+                logger.log_trace(f"Scheduler event {event_id} ({callback}) failed.")
+            metrics["fired"] += 1
+
+            current = events.get(event_id)
+            if current is None or current[0] != fire_at:
+                # the callback cancelled or rescheduled its own event
+                continue
+            if interval:
+                # keep the cadence, but don't fire repeatedly to catch up
+                next_fire = fire_at + interval
+                if next_fire <= now:
+                    next_fire = now + interval
+                events[event_id] = (next_fire, interval, callback, obj, event_kwargs)
+                heapq.heappush(queue, (next_fire, event_id))
+                self._save_fire_time(event_id, next_fire)
+            else:
+                events.pop(event_id, None)
+                self._delete_event(event_id)
@@ -0,0 +1,66 @@
+"""
+Tests for the room look.
+
+Run with `evennia test --settings settings.py typeclasses`.
+"""
+from unittest.mock import PropertyMock, patch
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from evennia.utils import create
+from evennia.utils.test_resources import EvenniaTest
+
+from typeclasses.characters import Character
+from typeclasses.rooms import LOOK_ATTRIBUTES, RoomParent
+from world.wod20th.utils.prefetch import prefetch_attributes
+
+
+class TestLookPrefetch(EvenniaTest):
+    room_typeclass = RoomParent
+    character_typeclass = Character
+
+    def _occupants(self, count):
+        occupants = []
+        for number in range(count):
+            occupant = create.create_object(Character, key=f"Occupant{number}", location=self.room1)
+            occupant.db.shortdesc = f"Occupant number {number}."
+            occupants.append(occupant)
+        return occupants
+
+    def _cold(self, objs):
+        for obj in objs:
+            obj.attributes.reset_cache()
+
+    def test_prefetch_is_one_query(self):
+        for count in (2, 20):
+            occupants = self._occupants(count)
+            self._cold(occupants)
+            with self.assertNumQueries(1):
+                prefetch_attributes(occupants, LOOK_ATTRIBUTES)
+            with self.assertNumQueries(0):
+                for occupant in occupants:
+                    self.assertTrue(occupant.db.shortdesc)
+                    self.assertIsNone(occupant.db.gradient)
+                    self.assertIsNone(occupant.db.gradient_name)
+            # a warm cache needs no query at all
+            with self.assertNumQueries(0):
+                self.assertEqual(prefetch_attributes(occupants, LOOK_ATTRIBUTES), 0)
+            for occupant in occupants:
+                occupant.delete()
+
+    def _look_queries(self, count):
+        occupants = self._occupants(count)
+        self.room1.ndb.contents_index = None
+        self.room1.invalidate_appearance()
+        self.room1.return_appearance(self.char1)
+        self._cold(occupants)
+        with CaptureQueriesContext(connection) as queries:
+            self.room1.return_appearance(self.char1)
+        for occupant in occupants:
+            occupant.delete()
+        return len(queries)
+
+    @patch.object(Character, "idle_time", new_callable=PropertyMock, return_value=0)
+    @patch.object(Character, "has_account", new_callable=PropertyMock, return_value=True)
+    def test_look_queries_do_not_grow_with_occupancy(self, has_account, idle_time):
+        self.assertEqual(self._look_queries(2), self._look_queries(20))
@@ -1,11 +1,10 @@
-from django.apps import AppConfig
-
-class Wod20thConfig(AppConfig):
-    name = 'wod20th'
-    verbose_name = 'World of Darkness 20th Anniversary Edition'
 # world/wod20th/apps.py
 from django.apps import AppConfig
 
 class Wod20thConfig(AppConfig):
     name = 'world.wod20th'
     verbose_name = 'World of Darkness 20th Anniversary Edition'
+
+    def ready(self):
+        # connects the signal handlers keeping the stat catalog current
+        from . import catalog, snapshot  # noqa: F401
@@ -0,0 +1,241 @@
+# world/wod20th/catalog.py
+"""
+In-process registry of the Stat catalog.
+
+The catalog is read in full on first use (or attached to a snapshot at
+server start, see snapshot.py) and afterwards kept current by the
+post_save/post_delete signals of the Stat model, so lookups are plain dict
+accesses instead of database queries.
+
+Signals only fire in the process that made the write, and stats are usually
+imported by `evennia load_wod20th_stats` in a separate process. A lookup
+that misses therefore checks the database once before giving up; the miss
+is remembered for MISS_TTL seconds so unknown names don't cost a query on
+every call. Edits and deletions of stats that are already cached are not
+seen until the catalog is reloaded, with `+statsearch/reindex` or a server
+reload.
+
+"""
+import time
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Stat
+
+# seconds a lookup that missed in the database too is answered from memory
+MISS_TTL = 30
+MAX_MISSES = 10000
+
+
+class StatCatalog:
+    """
+    Process-wide cache of Stat rows, indexed by name and by the full
+    (name, game_line, category, stat_type) key.
+    """
+
+    def __init__(self):
+        self._by_pk = {}
+        self._by_key = {}
+        self._by_name = {}
+        self._missed = {}
+        self._snapshot = None
+        self._fetched = set()
+        self._loaded = False
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key_for(stat):
+        return (stat.name, stat.game_line, stat.category, stat.stat_type)
+
+    def _index(self, stat):
+        # values or locks may have changed, so drop anything compiled from them
+        stat.__dict__.pop("validator", None)
+        stat.__dict__.pop("locks", None)
+        self._missed.pop(("name", stat.name), None)
+        self._missed.pop(("key", self.key_for(stat)), None)
+        self._by_pk[stat.pk] = stat
+        self._by_key[self.key_for(stat)] = stat
+        entries = [s for s in self._by_name.get(stat.name, []) if s.pk != stat.pk]
+        entries.append(stat)
+        entries.sort(key=lambda s: s.pk)
+        self._by_name[stat.name] = entries
+
+    def _unindex(self, pk):
+        stat = self._by_pk.pop(pk, None)
+        if stat is None:
+            return
+        key = self.key_for(stat)
+        if self._by_key.get(key) is stat:
+            del self._by_key[key]
+        remaining = [s for s in self._by_name.get(stat.name, []) if s.pk != pk]
+        if remaining:
+            self._by_name[stat.name] = remaining
+        else:
+            self._by_name.pop(stat.name, None)
+
+    def _reset(self):
+        self._by_pk = {}
+        self._by_key = {}
+        self._by_name = {}
+        self._missed = {}
+        if self._snapshot is not None:
+            self._snapshot.close()
+        self._snapshot = None
+        self._fetched = set()
+
+    def load(self):
+        """
+        (Re)fill the catalog from the database in a single query.
+        """
+        self.populate(Stat.objects.order_by("pk"))
+
+    def populate(self, stats):
+        """
+        Replace the catalog contents with `stats`.
+        """
+        self._reset()
+        for stat in stats:
+            self._index(stat)
+        self._loaded = True
+
+    def attach(self, snapshot):
+        """
+        Serve the catalog from a StatSnapshot. Its records are decoded
+        the first time their name is looked up; the file stays mapped
+        until the catalog is reloaded or a stat changes.
+        """
+        self._reset()
+        self._snapshot = snapshot
+        self._loaded = True
+
+    def _fetch(self, name):
+        if self._snapshot is None or name in self._fetched:
+            return
+        self._fetched.add(name)
+        for stat in self._snapshot.find(name):
+            self._index(stat)
+
+    def materialize(self):
+        """
+        Decode the snapshot records not looked up yet and release the
+        file, e.g. before the catalog is changed in place.
+        """
+        snapshot, self._snapshot = self._snapshot, None
+        if snapshot is None:
+            return
+        for stat in snapshot:
+            if stat.name not in self._fetched:
+                self._index(stat)
+        snapshot.close()
+        self._fetched = set()
+
+    def forget(self, pk):
+        """
+        Drop the Stat with primary key `pk`, e.g. one found to be deleted
+        by another process.
+        """
+        self._unindex(pk)
+
+    def clear(self):
+        """
+        Drop all entries; the next lookup reloads the catalog.
+        """
+        self._reset()
+        self._loaded = False
+
+    def _lookup(self, index, key, kind, query):
+        if not self._loaded:
+            self.load()
+        self._fetch(key if kind == "name" else key[0])
+        found = index.get(key)
+        if found:
+            self.hits += 1
+            return found
+        self.misses += 1
+        # the stat may have been created by another process
+        missed_at = self._missed.get((kind, key))
+        if missed_at is not None and time.monotonic() - missed_at < MISS_TTL:
+            return None
+        for stat in query.order_by("pk"):
+            self._unindex(stat.pk)
+            self._index(stat)
+        found = index.get(key)
+        if not found:
+            if len(self._missed) >= MAX_MISSES:
+                self._missed = {}
+            self._missed[(kind, key)] = time.monotonic()
+        return found
+
+    def get(self, name):
+        """
+        Return the first Stat (by primary key) called `name`, or None.
+        """
+        entries = self._lookup(self._by_name, name, "name", Stat.objects.filter(name=name))
+        return entries[0] if entries else None
+
+    def get_all(self, name):
+        """
+        Return every Stat called `name`, across game lines and types.
+        """
+        return list(self._lookup(self._by_name, name, "name", Stat.objects.filter(name=name)) or [])
+
+    def get_by_key(self, name, game_line, category, stat_type):
+        """
+        Return the Stat matching the full unique key, or None.
+        """
+        key = (name, game_line, category, stat_type)
+        query = Stat.objects.filter(name=name, game_line=game_line, category=category, stat_type=stat_type)
+        return self._lookup(self._by_key, key, "key", query)
+
+    def all(self):
+        if not self._loaded:
+            self.load()
+        self.materialize()
+        return list(self._by_key.values())
+
+    def stats(self):
+        """
+        Return cache counters for monitoring.
+        """
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._by_key),
+            "loaded": self._loaded,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / total) if total else 0.0,
+        }
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        if not self._loaded:
+            self.load()
+        self.materialize()
+        return len(self._by_key)
+
+
+STAT_CATALOG = StatCatalog()
+
+
+@receiver(post_save, sender=Stat, dispatch_uid="wod20th_stat_catalog_save")
+def _stat_saved(sender, instance, **kwargs):
+    if not STAT_CATALOG._loaded:
+        return
+    # the snapshot still holds the old row, so stop reading from it
+    STAT_CATALOG.materialize()
+    # the key fields may have changed, so drop the old entry first
+    STAT_CATALOG._unindex(instance.pk)
+    STAT_CATALOG._index(instance)
+
+
+@receiver(post_delete, sender=Stat, dispatch_uid="wod20th_stat_catalog_delete")
+def _stat_deleted(sender, instance, **kwargs):
+    if not STAT_CATALOG._loaded:
+        return
+    STAT_CATALOG.materialize()
+    STAT_CATALOG._unindex(instance.pk)
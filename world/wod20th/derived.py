@@ -0,0 +1,129 @@
+# world/wod20th/derived.py
+"""
+Derived stats.
+
+A derived stat is computed from other stats on the same sheet, e.g.
+blood pool from Generation, health levels from damage taken or
+initiative from Dexterity + Wits. Each
+one declares its inputs, which gives a dependency graph: when a stat
+changes, only the derived stats that (directly or through other derived
+stats) depend on it need recomputing. `StatHandler` caches computed
+values and uses `affected_by` to invalidate them.
+
+Register new ones with the `derived_stat` decorator:
+
+    @derived_stat("Initiative Rating", "Dexterity", "Wits")
+    def initiative(dexterity, wits):
+        ...
+
+Derived names must not clash with stored traits: current blood pool and
+Willpower are spent and regained, so their derived ceilings are "Blood
+Pool Max" and "Willpower Max".
+"""
+from functools import lru_cache
+
+DERIVED_STATS = {}
+
+
+class DerivedStat:
+    __slots__ = ("name", "inputs", "compute")
+
+    def __init__(self, name, inputs, compute):
+        self.name = name
+        self.inputs = tuple(inputs)
+        self.compute = compute
+
+    def __repr__(self):
+        return f"<DerivedStat {self.name} <- {', '.join(self.inputs)}>"
+
+
+def derived_stat(name, *inputs):
+    """
+    Decorator registering `func(*input_values)` as the derived stat `name`.
+
+    The function receives the current value of each input, or None if
+    the character does not have it.
+    """
+    def decorator(func):
+        DERIVED_STATS[name] = DerivedStat(name, inputs, func)
+        affected_by.cache_clear()
+        return func
+    return decorator
+
+
+def is_derived(stat_name):
+    return stat_name in DERIVED_STATS
+
+
+@lru_cache(maxsize=None)
+def affected_by(stat_name):
+    """
+    All derived stats whose value depends on `stat_name`, directly or
+    through other derived stats.
+
+    Returns:
+        frozenset: Names of the derived stats to invalidate.
+    """
+    affected = set()
+    pending = [stat_name]
+    while pending:
+        current = pending.pop()
+        for derived in DERIVED_STATS.values():
+            if current in derived.inputs and derived.name not in affected:
+                affected.add(derived.name)
+                pending.append(derived.name)
+    return frozenset(affected)
+
+
+# Generation tables (V20 core, p. 142)
+GENERATION_BLOOD_POOL = {13: 10, 12: 11, 11: 12, 10: 13, 9: 14, 8: 15, 7: 20, 6: 30, 5: 40, 4: 50}
+GENERATION_BLOOD_PER_TURN = {13: 1, 12: 1, 11: 1, 10: 1, 9: 2, 8: 3, 7: 4, 6: 6, 5: 8, 4: 10}
+GENERATION_TRAIT_MAX = {13: 5, 12: 5, 11: 5, 10: 5, 9: 5, 8: 5, 7: 6, 6: 7, 5: 8, 4: 9}
+
+# Health levels: Bruised to Crippled, then Incapacitated.
+# WOUND_PENALTIES is the dice penalty after taking that many levels.
+HEALTH_LEVELS = 7
+WOUND_PENALTIES = (0, 0, -1, -1, -2, -2, -5)
+
+
+@derived_stat("Initiative Rating", "Dexterity", "Wits")
+def initiative(dexterity, wits):
+    return (dexterity or 0) + (wits or 0)
+
+
+@derived_stat("Soak Pool", "Stamina", "Fortitude")
+def soak(stamina, fortitude):
+    return (stamina or 0) + (fortitude or 0)
+
+
+@derived_stat("Health Levels", "Bashing Damage", "Lethal Damage", "Aggravated Damage")
+def health_levels(bashing, lethal, aggravated):
+    return max(0, HEALTH_LEVELS - (bashing or 0) - (lethal or 0) - (aggravated or 0))
+
+
+@derived_stat("Wound Penalty", "Health Levels")
+def wound_penalty(health):
+    # None once incapacitated: no action can be taken at all
+    taken = HEALTH_LEVELS - health
+    return WOUND_PENALTIES[taken] if taken < HEALTH_LEVELS else None
+
+
+@derived_stat("Willpower Max", "Willpower", "Courage")
+def willpower_max(willpower, courage):
+    # permanent Willpower starts at Courage until raised
+    return willpower if willpower is not None else (courage or 0)
+
+
+@derived_stat("Blood Pool Max", "Generation")
+def blood_pool(generation):
+    return GENERATION_BLOOD_POOL.get(generation)
+
+
+@derived_stat("Blood Per Turn", "Generation")
+def blood_per_turn(generation):
+    return GENERATION_BLOOD_PER_TURN.get(generation)
+
+
+@derived_stat("Trait Max", "Generation")
+def trait_max(generation):
+    return GENERATION_TRAIT_MAX.get(generation, 5)
@@ -0,0 +1,183 @@
+# world/wod20th/dice.py
+"""
+WoD20 dice-pool engine.
+
+Pools of d10s are rolled against a difficulty; every die at or above the
+difficulty is a success and every 1 cancels one success. A roll with no
+successes and at least one 1 is a botch. With a specialty, 10s count as
+two successes. With `reroll_tens`, each 10 adds another die (optional
+house rule); 1s on those extra dice do not cancel anything.
+
+All rollers in a scene are resolved together: `roll_pools` rolls one
+(rollers x dice) array per call, so a 50-combatant round is a single
+batched operation. NumPy is used when installed, with a plain Python
+fallback applying the same rules.
+"""
+import random
+import re
+from collections import namedtuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+MIN_DIFFICULTY = 2
+MAX_DIFFICULTY = 10
+
+RollResult = namedtuple("RollResult", ["dice", "successes", "botch"])
+RollResult.__doc__ = """
+Outcome of one pool.
+
+dice (tuple): Face values rolled, including rerolled 10s.
+successes (int): Net successes after 1s cancel; never below 0.
+botch (bool): No successes were rolled and at least one 1 was.
+"""
+
+
+_POOL_TERM = re.compile(r"([+-]?)\s*([^+-]+)")
+
+
+def clamp_difficulty(difficulty):
+    return max(MIN_DIFFICULTY, min(MAX_DIFFICULTY, int(difficulty)))
+
+
+def resolve_pool(character, expression):
+    """
+    Resolve a pool expression such as "Dexterity+Brawl-1" against a
+    character's stats.
+
+    Returns:
+        int or None: Dice in the pool, or None if a stat is unknown.
+    """
+    total = 0
+    for sign, term in _POOL_TERM.findall(expression):
+        term = term.strip()
+        if term.isdigit():
+            value = int(term)
+        else:
+            value = character.get_stat(term) if hasattr(character, "get_stat") else None
+            if not isinstance(value, int):
+                return None
+        total += -value if sign == "-" else value
+    return total
+
+
+class DiceEngine:
+    """
+    Seedable roller for batches of dice pools.
+
+    Args:
+        seed (int, optional): Seed for a reproducible sequence of rolls.
+        use_numpy (bool, optional): Force the NumPy or the pure Python
+            implementation; defaults to NumPy when it is installed.
+    """
+
+    def __init__(self, seed=None, use_numpy=None):
+        if use_numpy is None:
+            use_numpy = np is not None
+        if use_numpy and np is None:
+            raise ImportError("NumPy is not installed")
+        self.use_numpy = use_numpy
+        self.seed(seed)
+
+    def seed(self, seed=None):
+        if self.use_numpy:
+            self.rng = np.random.default_rng(seed)
+        else:
+            self.rng = random.Random(seed)
+
+    def roll(self, pool, difficulty=6, specialty=False, reroll_tens=False):
+        """
+        Roll a single pool. See `roll_pools`.
+        """
+        return self.roll_pools([pool], [difficulty], [specialty], reroll_tens=reroll_tens)[0]
+
+    def roll_pools(self, pools, difficulties, specialties=None, reroll_tens=False):
+        """
+        Roll many pools at once.
+
+        Args:
+            pools (list of int): Dice per roller; pools below 1 fail outright.
+            difficulties (list of int or int): Difficulty per roller, or one
+                for everybody. Clamped to 2-10.
+            specialties (list of bool, optional): Whether 10s count double.
+            reroll_tens (bool): Roll an extra die for every 10.
+
+        Returns:
+            list of RollResult: One result per pool, in order.
+        """
+        count = len(pools)
+        if isinstance(difficulties, int):
+            difficulties = [difficulties] * count
+        if specialties is None:
+            specialties = [False] * count
+        if not (len(difficulties) == len(specialties) == count):
+            raise ValueError("pools, difficulties and specialties must have the same length")
+        if not count:
+            return []
+        pools = [max(0, int(pool)) for pool in pools]
+        difficulties = [clamp_difficulty(difficulty) for difficulty in difficulties]
+        if self.use_numpy:
+            return self._roll_numpy(pools, difficulties, specialties, reroll_tens)
+        return self._roll_python(pools, difficulties, specialties, reroll_tens)
+
+    def _roll_numpy(self, pools, difficulties, specialties, reroll_tens):
+        pools = np.asarray(pools, dtype=np.int64)
+        difficulty = np.asarray(difficulties, dtype=np.int64)[:, None]
+        specialty = np.asarray(specialties, dtype=bool)
+
+        width = int(pools.max()) if len(pools) else 0
+        dice = self.rng.integers(1, 11, size=(len(pools), width))
+        live = np.arange(width)[None, :] < pools[:, None]
+
+        hits = live & (dice >= difficulty)
+        tens = live & (dice == 10)
+        ones = live & (dice == 1)
+        successes = hits.sum(axis=1) + np.where(specialty, tens.sum(axis=1), 0)
+        ones_count = ones.sum(axis=1)
+        botch = (hits.sum(axis=1) == 0) & (ones_count > 0)
+        net = successes - ones_count
+
+        faces = [row[mask].tolist() for row, mask in zip(dice, live)]
+
+        pending = tens.sum(axis=1) if reroll_tens else None
+        while reroll_tens and pending.any():
+            width = int(pending.max())
+            extra = self.rng.integers(1, 11, size=(len(pools), width))
+            extra_live = np.arange(width)[None, :] < pending[:, None]
+            extra_hits = extra_live & (extra >= difficulty)
+            extra_tens = extra_live & (extra == 10)
+            net = net + extra_hits.sum(axis=1) + np.where(specialty, extra_tens.sum(axis=1), 0)
+            for row, values, mask in zip(faces, extra, extra_live):
+                row.extend(values[mask].tolist())
+            pending = extra_tens.sum(axis=1)
+
+        net = np.maximum(net, 0)
+        return [
+            RollResult(tuple(faces[i]), int(net[i]), bool(botch[i]))
+            for i in range(len(faces))
+        ]
+
+    def _roll_python(self, pools, difficulties, specialties, reroll_tens):
+        randint = self.rng.randint
+        results = []
+        for pool, difficulty, specialty in zip(pools, difficulties, specialties):
+            dice = [randint(1, 10) for _ in range(pool)]
+            hits = sum(1 for die in dice if die >= difficulty)
+            tens = dice.count(10)
+            ones = dice.count(1)
+            net = hits + (tens if specialty else 0) - ones
+            botch = hits == 0 and ones > 0
+            pending = tens if reroll_tens else 0
+            while pending:
+                extra = [randint(1, 10) for _ in range(pending)]
+                dice.extend(extra)
+                extra_tens = extra.count(10)
+                net += sum(1 for die in extra if die >= difficulty) + (extra_tens if specialty else 0)
+                pending = extra_tens
+            results.append(RollResult(tuple(dice), max(net, 0), botch))
+        return results
+
+
+DICE = DiceEngine()
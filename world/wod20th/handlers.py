@@ -0,0 +1,176 @@
+# world/wod20th/handlers.py
+"""
+Handlers attached to WoD characters.
+
+"""
+from evennia.utils.utils import delay
+from world.wod20th.derived import DERIVED_STATS, affected_by
+
+
+class StatHandler:
+    """
+    In-memory view of a character's `stats` Attribute with write-behind.
+
+    Reads and writes go to a plain dict. Changes are coalesced and saved
+    back as a single Attribute write, either on the next reactor tick or
+    when `flush()` is called (the base Command does so after every
+    command), instead of re-saving the whole dict on every assignment.
+
+    Derived stats (see `world.wod20th.derived`) are read through `get`
+    like any other stat. They are computed on first read and cached
+    until one of their inputs is written.
+
+    `version` is bumped on every stat (or splat) write; `memoize` caches
+    results such as lock checks until the next bump.
+
+    Accessed as `character.stats`.
+    """
+
+    __slots__ = ("obj", "version", "_cache", "_derived", "_memo", "_dirty", "_flush_scheduled")
+
+    def __init__(self, obj):
+        self.obj = obj
+        self.version = 0
+        self._cache = None
+        self._derived = {}
+        self._memo = {}
+        self._dirty = set()
+        self._flush_scheduled = False
+
+    def _load(self):
+        if self._cache is None:
+            stored = self.obj.attributes.get("stats", default=None)
+            # copy out of the _SaverDict so writes stay in memory until flushed
+            self._cache = dict(stored) if stored else {}
+        return self._cache
+
+    def get(self, stat_name, default=None):
+        derived = DERIVED_STATS.get(stat_name)
+        if derived is None:
+            return self._load().get(stat_name, default)
+        if stat_name not in self._derived:
+            self._derived[stat_name] = derived.compute(*(self.get(name) for name in derived.inputs))
+        value = self._derived[stat_name]
+        return default if value is None else value
+
+    def all(self):
+        """
+        Return a copy of all stats as a dict.
+        """
+        return dict(self._load())
+
+    def __contains__(self, stat_name):
+        return stat_name in self._load()
+
+    def set(self, stat_name, value):
+        """
+        Returns:
+            bool: False if `stat_name` is derived and can't be set.
+        """
+        if not self.is_writable(stat_name):
+            return False
+        self._load()[stat_name] = value
+        self._mark_dirty((stat_name,))
+        return True
+
+    def set_many(self, stats):
+        """
+        Set several stats at once.
+
+        Args:
+            stats (dict): Mapping of stat name to value.
+
+        Returns:
+            bool: False, and nothing is written, if any of the stats is
+                derived.
+        """
+        if not all(self.is_writable(stat_name) for stat_name in stats):
+            return False
+        self._load().update(stats)
+        self._mark_dirty(stats)
+        return True
+
+    def remove(self, stat_name):
+        cache = self._load()
+        if stat_name in cache:
+            del cache[stat_name]
+            self._mark_dirty((stat_name,))
+
+    def is_writable(self, stat_name):
+        # derived stats are computed from other stats, never stored
+        return stat_name not in DERIVED_STATS
+
+    def bump_version(self):
+        """
+        Invalidate memoized results; call after changing data they may
+        depend on outside this handler, such as the splat.
+        """
+        self.version += 1
+
+    def memoize(self, key, compute):
+        """
+        Return the cached result for `key` if nothing was written since it
+        was computed, otherwise call `compute()` and cache its result.
+
+        Returns:
+            tuple: (result, hit) where `hit` tells if the cache was used.
+        """
+        entry = self._memo.get(key)
+        if entry is not None and entry[0] == self.version:
+            return entry[1], True
+        result = compute()
+        self._memo[key] = (self.version, result)
+        return result, False
+
+    def _mark_dirty(self, stat_names):
+        self.version += 1
+        self._dirty.update(stat_names)
+        for stat_name in stat_names:
+            for derived_name in affected_by(stat_name):
+                self._derived.pop(derived_name, None)
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            delay(0, self.flush)
+
+    @property
+    def dirty(self):
+        return bool(self._dirty)
+
+    def flush(self):
+        """
+        Save pending changes in one Attribute write and mirror them to
+        the CharacterStat table.
+        """
+        from world.wod20th.models import CharacterStat
+
+        self._flush_scheduled = False
+        if not self._dirty:
+            return
+        dirty, self._dirty = self._dirty, set()
+        # apply only our changes on top of the stored dict, so writes made
+        # to db.stats outside the handler (@set, scripts) are kept
+        stored = self.obj.attributes.get("stats", default=None)
+        merged = dict(stored) if stored else {}
+        for stat_name in dirty:
+            if stat_name in self._cache:
+                merged[stat_name] = self._cache[stat_name]
+            else:
+                merged.pop(stat_name, None)
+        self.obj.attributes.add("stats", merged)
+        if merged != self._cache:
+            # pick up the outside writes too
+            self._cache = dict(merged)
+            self._derived = {}
+            self.version += 1
+        CharacterStat.objects.sync_character(
+            self.obj, {stat_name: self._cache.get(stat_name) for stat_name in dirty}
+        )
+
+    def reset(self):
+        """
+        Drop unsaved changes and re-read the Attribute on next access.
+        """
+        self._cache = None
+        self._derived = {}
+        self._dirty = set()
+        self.version += 1
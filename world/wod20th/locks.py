@@ -1,20 +1,72 @@
 # world/wod20th/locks.py
 from evennia.locks.lockfuncs import _TRUE, _FALSE
+from world.wod20th.handlers import StatHandler
+from world.wod20th.splats import has_affiliation
 
-def is_splat(character, splat_name):
+# lock check counters, see lock_cache_stats()
+LOCK_CHECKS = {"checks": 0, "hits": 0}
+
+
+def _memoized(character, key, compute):
+    """
+    Run `compute` through the character's stat handler cache, which is
+    invalidated on every stat or splat write.
+    """
+    LOCK_CHECKS["checks"] += 1
+    stats = getattr(character, "stats", None)
+    if not isinstance(stats, StatHandler):
+        return compute()
+    result, hit = stats.memoize(key, compute)
+    if hit:
+        LOCK_CHECKS["hits"] += 1
+    return result
+
+
+def lock_cache_stats():
+    """
+    Return lock check counts and the cache hit rate.
+    """
+    checks = LOCK_CHECKS["checks"]
+    return dict(LOCK_CHECKS, hit_rate=(LOCK_CHECKS["hits"] / checks) if checks else 0.0)
+
+
+def is_splat(accessing_obj, accessed_obj, *args, **kwargs):
     """
     Checks if the character belongs to a specific splat.
+
+    Usage:
+        is_splat(Vampire)
     """
-    return character.db.splat == splat_name
+    if not args:
+        return _FALSE
+    splat_name = args[0]
+    return _memoized(
+        accessing_obj, ("is_splat", splat_name), lambda: has_affiliation(accessing_obj, splat_name)
+    )
+
 
-def has_stat_value(character, stat_name, value):
+def has_stat_value(accessing_obj, accessed_obj, *args, **kwargs):
     """
     Checks if the character's stat is at least a specific value.
+
+    Usage:
+        has_stat_value(Dominate, 3)
     """
-    stat_value = character.get_stat(stat_name)
-    if stat_value is None:
+    if len(args) < 2:
+        return _FALSE
+    stat_name = args[0]
+    try:
+        value = int(args[1])
+    except ValueError:
         return _FALSE
-    return stat_value >= value
+
+    def compute():
+        stat_value = accessing_obj.get_stat(stat_name)
+        if stat_value is None:
+            return _FALSE
+        return stat_value >= value
+
+    return _memoized(accessing_obj, ("has_stat_value", stat_name, value), compute)
 
 # Register these functions in Evennia
 from evennia.locks.lockhandler import LOCK_FUNC_MODULES
@@ -0,0 +1,50 @@
+import textwrap
+import timeit
+
+from django.core.management.base import BaseCommand
+from evennia.utils.ansi import ANSIString, strip_raw_ansi
+from world.wod20th.utils.ansi_utils import wrap_ansi
+
+SAMPLE = "|rThe rain|n falls on |[b|500the city|n of lights and shadows, and    nobody   notices. "
+
+
+def legacy_wrap_ansi(text, width):
+    """
+    The ANSIString + textwrap implementation wrap_ansi replaced, kept
+    here only as the baseline for the benchmark.
+    """
+    text = ANSIString(text)
+    raw_text = strip_raw_ansi(text)
+    wrapped_lines = textwrap.wrap(raw_text, width=width)
+
+    current_index = 0
+    wrapped_text = ""
+    for line in wrapped_lines:
+        visible_length = len(line)
+        ansi_part = text[current_index:current_index + visible_length]
+        current_index += visible_length
+        wrapped_text += str(ansi_part) + "\n"
+
+    return wrapped_text.strip()
+
+
+class Command(BaseCommand):
+    help = 'Compare wrap_ansi with the old ANSIString/textwrap wrapper on long descriptions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 5000, 20000],
+                            help='Description lengths to time, in characters')
+        parser.add_argument('--width', type=int, default=78, help='Wrap width')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per measurement')
+
+    def handle(self, *args, **kwargs):
+        width = kwargs['width']
+        repeat = kwargs['repeat']
+        # time the wrapping itself, not the (text, width) cache
+        uncached = wrap_ansi.__wrapped__
+        self.stdout.write(f'{"chars":>8} {"old (ms)":>10} {"new (ms)":>10} {"speedup":>8}')
+        for size in kwargs['sizes']:
+            text = (SAMPLE * (size // len(SAMPLE) + 1))[:size]
+            old = min(timeit.repeat(lambda: legacy_wrap_ansi(text, width), number=1, repeat=repeat))
+            new = min(timeit.repeat(lambda: uncached(text, width), number=1, repeat=repeat))
+            self.stdout.write(f'{size:>8} {old * 1000:>10.2f} {new * 1000:>10.2f} {old / new:>7.1f}x')
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from world.wod20th.snapshot import snapshot_path, write_snapshot
+
+class Command(BaseCommand):
+    help = 'Export the WoD20th stat catalog to a binary snapshot loaded at server start'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', type=str, default=None,
+                            help='Snapshot file to write (default: settings.WOD20TH_STAT_SNAPSHOT)')
+
+    def handle(self, *args, **kwargs):
+        path = kwargs['output'] or snapshot_path()
+        try:
+            count = write_snapshot(path)
+        except OSError as e:
+            self.stdout.write(self.style.ERROR(f'Could not write snapshot {path}: {e}'))
+            return
+        self.stdout.write(self.style.SUCCESS(f'Wrote {count} stats to {path}.'))
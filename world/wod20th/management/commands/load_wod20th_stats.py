@@ -1,65 +1,210 @@
+import hashlib
 import json
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import django
 from django.core.management.base import BaseCommand
 from world.wod20th.models import Stat
-from django.db import connection
+from world.wod20th.snapshot import invalidate_snapshot
+from world.wod20th.stat_values import expand_values
+from world.wod20th.utils.json_stream import batched, iter_json_array, iter_jsonl
+from django.db import connection, transaction
 from django.core.exceptions import ValidationError
 
+STAT_FIELDS = ['name', 'description', 'game_line', 'category', 'stat_type', 'values']
+# fields compared by --update; the remaining fields form the lookup key
+SYNC_FIELDS = ['description', 'values']
+
+
+def content_hash(description, values):
+    """
+    Stable digest of the fields a sync may change.
+    """
+    payload = json.dumps([description, values], sort_keys=True, separators=(',', ':'))
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def build_stat(stat_data):
+    """
+    Check a raw JSON record and build an unsaved Stat from it.
+
+    Returns:
+        tuple: (stat, error) - exactly one of them is None.
+    """
+    if not isinstance(stat_data, dict):
+        return None, 'Stat entry is not a JSON object. Skipping entry.'
+
+    name = stat_data.get('name')
+    if not name:
+        return None, 'Missing stat name in data. Skipping entry.'
+
+    description = stat_data.get('description', '')
+    game_line = stat_data.get('game_line')
+    category = stat_data.get('category')
+    stat_type = stat_data.get('stat_type')
+    values = stat_data.get('values', [])
+
+    # Data validation
+    if not game_line or not category or not stat_type:
+        return None, f'Invalid data for stat {name}. Skipping entry.'
+
+    # Expand the compact {"min": .., "max": ..} range encoding
+    try:
+        values = expand_values(values)
+    except ValueError as e:
+        return None, f'Invalid values for stat {name}: {e}. Skipping entry.'
+
+    # Ensure values are a list of integers
+    if not isinstance(values, list) or not all(isinstance(v, int) for v in values):
+        return None, f'Invalid values for stat {name}. Values must be a list of integers. Skipping entry.'
+
+    stat = Stat(
+        name=name,
+        description=description,
+        game_line=game_line,
+        category=category,
+        stat_type=stat_type,
+        values=values
+    )
+    return stat, None
+
+
+def validate_record(stat_data):
+    """
+    Build and model-validate one raw record without touching the database.
+
+    Returns:
+        tuple: (fields, error) - the normalized field dict or an error message.
+    """
+    stat, error = build_stat(stat_data)
+    if error:
+        return None, error
+    try:
+        # uniqueness is checked against the preloaded keys, so skip the per-row queries
+        stat.full_clean(validate_unique=False, validate_constraints=False)
+    except ValidationError as e:
+        return None, f'Validation error for stat {stat.name}: {e}'
+    return {field: getattr(stat, field) for field in STAT_FIELDS}, None
+
+
+def validate_chunk(chunk):
+    """
+    Process-pool entry point: validate a list of records in order.
+    """
+    return [validate_record(stat_data) for stat_data in chunk]
+
+
+class StageTimer:
+    """
+    Accumulates wall time and item counts per import stage.
+    """
+
+    def __init__(self):
+        self.seconds = {}
+        self.items = {}
+
+    def add(self, stage, seconds, items):
+        self.seconds[stage] = self.seconds.get(stage, 0.0) + seconds
+        self.items[stage] = self.items.get(stage, 0) + items
+
+    def iterate(self, stage, iterable):
+        """
+        Yield from `iterable`, charging the time spent producing each item to `stage`.
+        """
+        iterator = iter(iterable)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.add(stage, time.perf_counter() - start, 0)
+                return
+            self.add(stage, time.perf_counter() - start, 1)
+            yield item
+
+    def report(self):
+        lines = []
+        for stage, seconds in self.seconds.items():
+            items = self.items[stage]
+            rate = items / seconds if seconds else 0.0
+            lines.append(f'{stage}: {items} records in {seconds:.2f}s ({rate:.0f} records/s)')
+        return lines
+
+
 class Command(BaseCommand):
-    help = 'Load WoD20th stats from a JSON file'
+    help = 'Load WoD20th stats from a JSON or JSONL file'
 
     def add_arguments(self, parser):
         parser.add_argument('json_file', type=str, help='Path to the JSON file containing stats')
+        parser.add_argument('--format', choices=['auto', 'json', 'jsonl'], default='auto',
+                            help='Input format: a JSON array or one JSON object per line (default: by file extension)')
+        parser.add_argument('--bulk', action='store_true',
+                            help='Validate in memory and insert new stats with batched bulk_create in one transaction')
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Number of rows per bulk_create batch (default: 500)')
+        parser.add_argument('--update', '--sync', dest='update', action='store_true',
+                            help='Also update existing stats whose description or values changed (implies --bulk)')
+        parser.add_argument('--prune', action='store_true',
+                            help='With --update, delete stats that are not present in the file')
+        parser.add_argument('--workers', type=int, default=0,
+                            help='Validate records in a pool of N processes (implies --bulk; default: serial)')
 
     def handle(self, *args, **kwargs):
         json_file = kwargs['json_file']
-        
+        records = self.read_records(json_file, kwargs['format'])
+        self.workers = kwargs['workers']
+        self.batch_size = kwargs['batch_size']
+        self.timer = StageTimer()
+
+        if kwargs['prune'] and not kwargs['update']:
+            self.stdout.write(self.style.ERROR('--prune can only be used together with --update.'))
+            return
+        if self.batch_size < 1:
+            self.stdout.write(self.style.ERROR('--batch-size must be at least 1.'))
+            return
+
         try:
-            with open(json_file, 'r') as file:
-                stats_data = json.load(file)
+            if kwargs['update']:
+                self.handle_sync(records, kwargs['batch_size'], kwargs['prune'])
+            elif kwargs['bulk'] or self.workers:
+                self.handle_bulk(records, kwargs['batch_size'])
+            else:
+                self.handle_records(records)
         except FileNotFoundError:
             self.stdout.write(self.style.ERROR(f'File {json_file} not found.'))
-            return
-        except json.JSONDecodeError:
-            self.stdout.write(self.style.ERROR(f'Error decoding JSON from file {json_file}.'))
-            return
-        
-        for stat_data in stats_data:
-            name = stat_data.get('name')
-            if not name:
-                self.stdout.write(self.style.ERROR('Missing stat name in data. Skipping entry.'))
-                continue
-            
-            description = stat_data.get('description', '')
-            game_line = stat_data.get('game_line')
-            category = stat_data.get('category')
-            stat_type = stat_data.get('stat_type')
-            values = stat_data.get('values', [])
-
-            # Data validation
-            if not game_line or not category or not stat_type:
-                self.stdout.write(self.style.ERROR(f'Invalid data for stat {name}. Skipping entry.'))
-                continue
+        except json.JSONDecodeError as e:
+            self.stdout.write(self.style.ERROR(f'Error decoding JSON from file {json_file}: {e}'))
+
+    def read_records(self, json_file, fmt):
+        """
+        Lazily yield raw records from the input file.
+
+        JSON arrays are parsed incrementally and JSONL is read line by
+        line, so only one record is held in memory at a time.
+        """
+        if fmt == 'auto':
+            fmt = 'jsonl' if os.path.splitext(json_file)[1].lower() in ('.jsonl', '.ndjson') else 'json'
+        with open(json_file, 'r') as file:
+            if fmt == 'jsonl':
+                yield from iter_jsonl(file)
+            else:
+                yield from iter_json_array(file)
 
-            # Ensure values are a list of integers
-            if not isinstance(values, list) or not all(isinstance(v, int) for v in values):
-                self.stdout.write(self.style.ERROR(f'Invalid values for stat {name}. Values must be a list of integers. Skipping entry.'))
+    def handle_records(self, records):
+        for stat_data in records:
+            stat, error = build_stat(stat_data)
+            if error:
+                self.stdout.write(self.style.ERROR(error))
                 continue
 
             # Check if stat already exists
-            existing_stat = Stat.objects.filter(name=name, game_line=game_line, category=category, stat_type=stat_type).first()
+            existing_stat = Stat.objects.filter(name=stat.name, game_line=stat.game_line, category=stat.category, stat_type=stat.stat_type).first()
             if existing_stat:
-                self.stdout.write(self.style.WARNING(f'Stat {name} already exists. Skipping entry.'))
+                self.stdout.write(self.style.WARNING(f'Stat {stat.name} already exists. Skipping entry.'))
                 continue
-            
-            # Create new stat
-            stat = Stat(
-                name=name,
-                description=description,
-                game_line=game_line,
-                category=category,
-                stat_type=stat_type,
-                values=values
-            )
 
             try:
                 # Validate the model before saving
@@ -69,13 +214,187 @@ class Command(BaseCommand):
             except ValidationError as e:
                 self.stdout.write(self.style.ERROR(f'Validation error for stat {stat.name}: {e}'))
             except Exception as e:
-                self.stdout.write(self.style.ERROR(f'Error saving stat {stat.name}: {e}'))
-                self.stdout.write(self.style.ERROR(f'Stat object: {stat.__dict__}'))
-                if connection.queries:
-                    last_query = connection.queries[-1]
-                    self.stdout.write(self.style.ERROR(f'SQL: {last_query.get("sql", "N/A")}'))
-                    self.stdout.write(self.style.ERROR(f'SQL params: {last_query.get("params", "N/A")}'))
-                else:
-                    self.stdout.write(self.style.ERROR('No SQL queries recorded.'))
-
-        self.stdout.write(self.style.SUCCESS('Finished processing all stats.'))
\ No newline at end of file
+                self.report_save_error(stat, e)
+
+        self.stdout.write(self.style.SUCCESS('Finished processing all stats.'))
+
+    def handle_bulk(self, records, batch_size):
+        """
+        Set-based import: one query for the existing keys, in-memory
+        validation and batched inserts inside a single transaction.
+
+        Records are validated and written batch by batch as they are
+        read, so memory use does not grow with the size of the file.
+        """
+        existing_keys = set(Stat.objects.values_list('name', 'game_line', 'category', 'stat_type'))
+        counts = {'created': 0, 'skipped': 0, 'invalid': 0}
+
+        try:
+            with transaction.atomic():
+                for batch in batched(self.filter_new(self.validate_records(records, counts), existing_keys, counts), batch_size):
+                    self.write(Stat.objects.bulk_create, batch)
+                    counts['created'] += len(batch)
+        except (FileNotFoundError, json.JSONDecodeError):
+            raise
+        except Exception as e:
+            self.stdout.write(self.style.ERROR(f'Bulk insert failed, no stats were created: {e}'))
+            return
+        if counts['created']:
+            # bulk writes send no signals, so mark the snapshot stale here; a
+            # running server finds new stats on its next lookup of them
+            invalidate_snapshot()
+
+        self.report_timings()
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {counts["created"]} stats, skipped {counts["skipped"]} existing, {counts["invalid"]} invalid.'))
+
+    def handle_sync(self, records, batch_size, prune):
+        """
+        Upsert import: create new stats, rewrite only the stats whose
+        content hash differs from the stored row and optionally delete
+        stats missing from the file. Everything runs in one transaction.
+        """
+        existing = {}
+        for pk, name, game_line, category, stat_type, description, values in Stat.objects.values_list(
+                'pk', 'name', 'game_line', 'category', 'stat_type', *SYNC_FIELDS):
+            existing[(name, game_line, category, stat_type)] = (pk, content_hash(description, values))
+
+        counts = {'created': 0, 'updated': 0, 'unchanged': 0, 'pruned': 0, 'skipped': 0, 'invalid': 0}
+        seen = set()
+        to_create = []
+        to_update = []
+
+        try:
+            with transaction.atomic():
+                for stat in self.validate_records(records, counts):
+                    key = (stat.name, stat.game_line, stat.category, stat.stat_type)
+                    if key in seen:
+                        counts['skipped'] += 1
+                        continue
+                    seen.add(key)
+
+                    if key not in existing:
+                        to_create.append(stat)
+                    else:
+                        pk, stored_hash = existing[key]
+                        if stored_hash == content_hash(stat.description, stat.values):
+                            counts['unchanged'] += 1
+                            continue
+                        stat.pk = pk
+                        to_update.append(stat)
+
+                    if len(to_create) >= batch_size:
+                        self.write(Stat.objects.bulk_create, to_create)
+                        counts['created'] += len(to_create)
+                        to_create = []
+                    if len(to_update) >= batch_size:
+                        self.write(Stat.objects.bulk_update, to_update, SYNC_FIELDS)
+                        counts['updated'] += len(to_update)
+                        to_update = []
+
+                if to_create:
+                    self.write(Stat.objects.bulk_create, to_create)
+                    counts['created'] += len(to_create)
+                if to_update:
+                    self.write(Stat.objects.bulk_update, to_update, SYNC_FIELDS)
+                    counts['updated'] += len(to_update)
+
+                if prune and counts['invalid']:
+                    # an invalid record may still name a stored stat; pruning
+                    # would delete it along with every character's value for it
+                    self.stdout.write(self.style.WARNING(
+                        f'Not pruning: {counts["invalid"]} records failed validation. '
+                        'Fix them and run the sync again.'))
+                elif prune:
+                    stale = [pk for key, (pk, _) in existing.items() if key not in seen]
+                    for pk_batch in batched(stale, batch_size):
+                        # the total also counts the cascaded CharacterStat rows
+                        _, deleted = Stat.objects.filter(pk__in=pk_batch).delete()
+                        counts['pruned'] += deleted.get(Stat._meta.label, 0)
+        except (FileNotFoundError, json.JSONDecodeError):
+            raise
+        except Exception as e:
+            self.stdout.write(self.style.ERROR(f'Sync failed, no changes were made: {e}'))
+            return
+        if counts['created'] or counts['updated'] or counts['pruned']:
+            # a running server keeps serving its cached copies of edited or
+            # pruned stats until +statsearch/reindex or a reload
+            invalidate_snapshot()
+
+        self.report_timings()
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {counts["created"]}, updated {counts["updated"]}, unchanged {counts["unchanged"]}, '
+            f'pruned {counts["pruned"]} stats; skipped {counts["skipped"]} duplicates, {counts["invalid"]} invalid.'))
+
+    def validate_records(self, records, counts):
+        """
+        Yield Stats built from raw records that pass model validation.
+
+        With --workers, chunks of records are validated in a process pool
+        while this process keeps reading and writing. Results are consumed
+        in submission order, so output and error reporting stay the same
+        as a serial run.
+        """
+        if self.workers > 0:
+            results = self.validate_parallel(records)
+        else:
+            results = (validate_record(stat_data) for stat_data in records)
+
+        for fields, error in self.timer.iterate('validate', results):
+            if error:
+                counts['invalid'] += 1
+                self.stdout.write(self.style.ERROR(error))
+                continue
+            yield Stat(**fields)
+
+    def validate_parallel(self, records):
+        """
+        Yield validate_record() results for `records`, computed in a
+        process pool with a bounded number of chunks in flight.
+        """
+        max_pending = self.workers * 2
+        pending = deque()
+        # spawn rather than fork: forked children would inherit (and could
+        # close) the open database connection of the writing transaction
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=self.workers, mp_context=context, initializer=django.setup) as pool:
+            for chunk in batched(records, self.batch_size):
+                pending.append(pool.submit(validate_chunk, chunk))
+                if len(pending) >= max_pending:
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
+
+    def write(self, method, *args):
+        """
+        Run a bulk write and charge its time to the write stage.
+        """
+        start = time.perf_counter()
+        method(*args)
+        self.timer.add('write', time.perf_counter() - start, len(args[0]))
+
+    def report_timings(self):
+        for line in self.timer.report():
+            self.stdout.write(line)
+
+    def filter_new(self, stats, existing_keys, counts):
+        """
+        Yield only the Stats whose key is not in the database yet.
+        """
+        for stat in stats:
+            key = (stat.name, stat.game_line, stat.category, stat.stat_type)
+            if key in existing_keys:
+                counts['skipped'] += 1
+                continue
+            existing_keys.add(key)
+            yield stat
+
+    def report_save_error(self, stat, e):
+        self.stdout.write(self.style.ERROR(f'Error saving stat {stat.name}: {e}'))
+        self.stdout.write(self.style.ERROR(f'Stat object: {stat.__dict__}'))
+        if connection.queries:
+            last_query = connection.queries[-1]
+            self.stdout.write(self.style.ERROR(f'SQL: {last_query.get("sql", "N/A")}'))
+            self.stdout.write(self.style.ERROR(f'SQL params: {last_query.get("params", "N/A")}'))
+        else:
+            self.stdout.write(self.style.ERROR('No SQL queries recorded.'))
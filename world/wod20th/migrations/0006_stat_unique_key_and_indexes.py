@@ -0,0 +1,54 @@
+# Generated by Django 4.2.13 on 2026-10-18 10:12
+
+from django.db import migrations, models
+
+
+def check_duplicate_stats(apps, schema_editor):
+    """
+    Refuse to add the unique constraint while duplicate keys exist.
+
+    Which row of a duplicate is the right one (often the newer, corrected
+    one) can't be told automatically, so the conflicting pks are listed
+    for the operator to resolve before migrating again.
+    """
+    Stat = apps.get_model("wod20th", "Stat")
+    rows = {}
+    for pk, *key in Stat.objects.order_by("pk").values_list(
+        "pk", "name", "game_line", "category", "stat_type"
+    ):
+        rows.setdefault(tuple(key), []).append(pk)
+    conflicts = {key: pks for key, pks in rows.items() if len(pks) > 1}
+    if conflicts:
+        lines = "\n".join(
+            f"  {' / '.join(key)}: pks {', '.join(str(pk) for pk in pks)}"
+            for key, pks in conflicts.items()
+        )
+        raise RuntimeError(
+            "Cannot add the unique (name, game_line, category, stat_type) "
+            f"constraint; these stats are duplicated:\n{lines}\n"
+            "Delete or rename the unwanted rows and run the migration again."
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("wod20th", "0005_stat_lock_string"),
+    ]
+
+    operations = [
+        migrations.RunPython(check_duplicate_stats, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="stat",
+            constraint=models.UniqueConstraint(
+                fields=("name", "game_line", "category", "stat_type"),
+                name="unique_stat_key",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="stat",
+            index=models.Index(
+                fields=["game_line", "stat_type"], name="stat_line_type_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 4.2.13 on 2026-10-18 11:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("objects", "__first__"),
+        ("wod20th", "0006_stat_unique_key_and_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CharacterStat",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("value", models.IntegerField()),
+                (
+                    "character",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="wod_stats",
+                        to="objects.objectdb",
+                    ),
+                ),
+                (
+                    "stat",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="character_values",
+                        to="wod20th.stat",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="characterstat",
+            constraint=models.UniqueConstraint(
+                fields=("character", "stat"), name="unique_character_stat"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="characterstat",
+            index=models.Index(
+                fields=["stat", "value"], name="charstat_stat_value_idx"
+            ),
+        ),
+    ]
@@ -1,6 +1,9 @@
 # world/wod20th/models.py
 from django.db import models
 from django.db.models import JSONField
+from django.utils.functional import cached_property
+
+from .stat_values import compile_values
 
 # Define predefined categories and extended stat types
 CATEGORIES = [
@@ -38,5 +41,174 @@ class Stat(models.Model):
     values = JSONField(default=list)
     lock_string = models.CharField(max_length=255, blank=True, null=True)
 
+    class Meta:
+        constraints = [
+            # the index behind this constraint also serves lookups by name alone
+            models.UniqueConstraint(
+                fields=['name', 'game_line', 'category', 'stat_type'], name='unique_stat_key'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['game_line', 'stat_type'], name='stat_line_type_idx'),
+        ]
+
+    def __str__(self):
+        return self.name
+
+    @cached_property
+    def validator(self):
+        """
+        Compiled membership test for `values`, built once per instance.
+        """
+        return compile_values(self.values)
+
+    def is_valid_value(self, value):
+        return value in self.validator
+
+    @property
+    def lock_storage(self):
+        """
+        `lock_string` in the form Evennia's LockHandler reads. A string
+        without an access type, e.g. "is_splat(Vampire)", guards "edit".
+        """
+        lock_string = (self.lock_string or '').strip()
+        if lock_string and ':' not in lock_string:
+            lock_string = f'edit:{lock_string}'
+        return lock_string
+
+    @cached_property
+    def locks(self):
+        """
+        LockHandler for `lock_string`, parsed once per instance.
+        """
+        from evennia.locks.lockhandler import LockHandler
+        return LockHandler(self)
+
+    def access(self, accessing_obj, access_type='edit', default=True):
+        """
+        Check `lock_string` for `accessing_obj`. Stats without a lock are
+        open to everyone.
+        """
+        if not self.lock_string:
+            return default
+        return self.locks.check(accessing_obj, access_type, default=default)
+
+
+class StatCatalogVersion(models.Model):
+    """
+    Single-row counter bumped on every change to the Stat table, so a
+    catalog snapshot can tell in one cheap query whether it is current.
+    """
+    version = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f'stat catalog version {self.version}'
+
+
+# comparison operators accepted by CharacterStatQuerySet.characters_with()
+STAT_COMPARISONS = {
+    '>=': 'gte',
+    '>': 'gt',
+    '<=': 'lte',
+    '<': 'lt',
+    '=': 'exact',
+}
+
+
+class CharacterStatQuerySet(models.QuerySet):
+    def characters_with(self, stat_name, op='>=', value=1, queryset=None):
+        """
+        Characters whose stat compares to `value`, answered from the
+        (stat, value) index.
+
+        Args:
+            stat_name (str): Name of the stat.
+            op (str): One of the keys of STAT_COMPARISONS.
+            value (int): Value to compare against.
+            queryset (QuerySet, optional): ObjectDB queryset to narrow
+                down; pass the result of a previous call to combine
+                several conditions.
+
+        Returns:
+            QuerySet: Matching ObjectDB rows.
+        """
+        from evennia.objects.models import ObjectDB
+
+        lookup = STAT_COMPARISONS[op]
+        if queryset is None:
+            queryset = ObjectDB.objects.all()
+        return queryset.filter(
+            wod_stats__stat__name=stat_name, **{f'wod_stats__value__{lookup}': value}
+        ).distinct()
+
+    def sync_character(self, character, stats):
+        """
+        Mirror stat values from a character's stats Attribute.
+
+        Args:
+            character (ObjectDB): The character.
+            stats (dict): Stat name to current value. A value of None,
+                or any non-integer value, removes the mirrored row.
+        """
+        from .catalog import STAT_CATALOG
+
+        upserts = []
+        removed = []
+        for stat_name, value in stats.items():
+            stat = STAT_CATALOG.get(stat_name)
+            if not stat:
+                continue
+            if isinstance(value, int) and not isinstance(value, bool):
+                upserts.append(self.model(character=character, stat=stat, value=value))
+            else:
+                removed.append(stat.pk)
+
+        if upserts:
+            # the catalog of a running server can still hold stats that
+            # another process (e.g. load_wod20th_stats --prune) deleted
+            live = set(Stat.objects.filter(pk__in=[row.stat_id for row in upserts]).values_list('pk', flat=True))
+            for row in upserts:
+                if row.stat_id not in live:
+                    STAT_CATALOG.forget(row.stat_id)
+            upserts = [row for row in upserts if row.stat_id in live]
+        if upserts:
+            self.bulk_create(
+                upserts,
+                update_conflicts=True,
+                unique_fields=['character', 'stat'],
+                update_fields=['value'],
+            )
+        if removed:
+            self.filter(character=character, stat_id__in=removed).delete()
+
+    def rebuild_character(self, character, stats):
+        """
+        Replace all mirrored rows of a character with `stats`.
+        """
+        self.filter(character=character).delete()
+        self.sync_character(character, stats)
+
+
+class CharacterStat(models.Model):
+    """
+    Relational mirror of the stats stored in a character's `stats`
+    Attribute, so cross-character questions can be answered in SQL.
+    """
+    character = models.ForeignKey(
+        'objects.ObjectDB', on_delete=models.CASCADE, related_name='wod_stats'
+    )
+    stat = models.ForeignKey(Stat, on_delete=models.CASCADE, related_name='character_values')
+    value = models.IntegerField()
+
+    objects = CharacterStatQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['character', 'stat'], name='unique_character_stat'),
+        ]
+        indexes = [
+            models.Index(fields=['stat', 'value'], name='charstat_stat_value_idx'),
+        ]
+
     def __str__(self):
-        return self.name
\ No newline at end of file
+        return f'{self.character_id}: {self.stat_id}={self.value}'
@@ -0,0 +1,151 @@
+# world/wod20th/odds.py
+"""
+Exact success, failure and botch probabilities for WoD20 dice pools.
+
+Uses the same rules as `world.wod20th.dice` (without the optional 10s
+reroll): each die is a 1, a miss, a plain success or a 10. Summing the
+multinomial distribution of those four outcomes over a pool gives the
+exact odds, so lookups never need to simulate.
+
+Tables for every pool 1-20 x difficulty 2-10, with and without a
+specialty, are built once (at server start, or from a cached JSON file)
+and then served from a dict.
+"""
+import json
+import os
+from functools import lru_cache
+from math import comb
+
+MAX_POOL = 20
+DIFFICULTIES = range(2, 11)
+
+ODDS_TABLES = {}
+
+
+@lru_cache(maxsize=None)
+def pool_distribution(pool, difficulty, specialty=False):
+    """
+    Exact outcome distribution of one pool.
+
+    Args:
+        pool (int): Number of dice.
+        difficulty (int): Target number, 2-10.
+        specialty (bool): Whether 10s count as two successes.
+
+    Returns:
+        dict: Maps net successes (0 and up) to probability, plus the keys
+            "success", "failure", "botch" and "expected" (mean successes).
+    """
+    p_one = 0.1
+    p_ten = 0.1
+    p_hit = (10 - difficulty) / 10  # successes other than 10
+    p_miss = 1.0 - p_one - p_ten - p_hit
+    ten_value = 2 if specialty else 1
+
+    net = {}
+    botch = 0.0
+    for ones in range(pool + 1):
+        for tens in range(pool - ones + 1):
+            for hits in range(pool - ones - tens + 1):
+                misses = pool - ones - tens - hits
+                ways = comb(pool, ones) * comb(pool - ones, tens) * comb(pool - ones - tens, hits)
+                probability = ways * p_one ** ones * p_ten ** tens * p_hit ** hits * p_miss ** misses
+                if not probability:
+                    continue
+                if ones and not tens and not hits:
+                    botch += probability
+                    result = 0
+                else:
+                    result = max(0, hits + tens * ten_value - ones)
+                net[result] = net.get(result, 0.0) + probability
+
+    success = sum(probability for result, probability in net.items() if result > 0)
+    summary = dict(net)
+    summary.update(
+        success=success,
+        botch=botch,
+        failure=max(0.0, 1.0 - success - botch),
+        expected=sum(result * probability for result, probability in net.items()),
+    )
+    return summary
+
+
+def build_tables(max_pool=MAX_POOL):
+    """
+    Compute the odds for every pool and difficulty.
+
+    Returns:
+        dict: (pool, difficulty, specialty) -> (success, failure, botch, expected).
+    """
+    tables = {}
+    for specialty in (False, True):
+        for pool in range(1, max_pool + 1):
+            for difficulty in DIFFICULTIES:
+                dist = pool_distribution(pool, difficulty, specialty)
+                tables[(pool, difficulty, specialty)] = (
+                    dist["success"], dist["failure"], dist["botch"], dist["expected"]
+                )
+    return tables
+
+
+def save_tables(path, tables=None):
+    tables = tables or ODDS_TABLES or build_tables()
+    rows = [[pool, difficulty, specialty, *odds] for (pool, difficulty, specialty), odds in tables.items()]
+    with open(path, "w") as file:
+        json.dump({"max_pool": max(key[0] for key in tables), "rows": rows}, file)
+
+
+def _read_tables(path):
+    with open(path) as file:
+        data = json.load(file)
+    return {(row[0], row[1], bool(row[2])): tuple(row[3:]) for row in data["rows"]}
+
+
+def load_tables(path=None):
+    """
+    Fill ODDS_TABLES, from `path` if it holds a complete table, otherwise
+    by computing it (and writing it to `path` for next time).
+    """
+    tables = None
+    if path and os.path.exists(path):
+        try:
+            tables = _read_tables(path)
+        except (OSError, ValueError, KeyError, IndexError, TypeError):
+            tables = None
+        if tables is not None and len(tables) != 2 * MAX_POOL * len(DIFFICULTIES):
+            tables = None
+    if tables is None:
+        tables = build_tables()
+        if path:
+            try:
+                save_tables(path, tables)
+            except OSError:
+                pass
+    ODDS_TABLES.clear()
+    ODDS_TABLES.update(tables)
+    return ODDS_TABLES
+
+
+def get_odds(pool, difficulty, specialty=False):
+    """
+    Look up the odds of a roll.
+
+    Returns:
+        tuple: (success, failure, botch, expected successes).
+
+    Raises:
+        ValueError: If `pool` is larger than MAX_POOL; computing those
+            exactly is too slow to do while the server waits.
+    """
+    difficulty = max(2, min(10, int(difficulty)))
+    if pool < 1:
+        return (0.0, 1.0, 0.0, 0.0)
+    if pool > MAX_POOL:
+        raise ValueError(f"The pool must be at most {MAX_POOL} dice.")
+    if not ODDS_TABLES:
+        load_tables()
+    odds = ODDS_TABLES.get((pool, difficulty, bool(specialty)))
+    if odds is None:
+        dist = pool_distribution(pool, difficulty, bool(specialty))
+        odds = (dist["success"], dist["failure"], dist["botch"], dist["expected"])
+    return odds
@@ -0,0 +1,220 @@
+# world/wod20th/snapshot.py
+"""
+Binary snapshot of the Stat catalog.
+
+The snapshot is a single file that can be memory-mapped read-only:
+
+    header   magic, format version, record count, catalog version
+    index    one (pk, offset, name length, body length) entry per record,
+             sorted by name
+    records  the stat name followed by a compact JSON body
+
+At server start the catalog is attached to the mapped file instead of
+building Stat instances from the database. Records are only decoded when
+their name is first looked up, found by binary search over the index,
+and the file stays mapped, so its pages are shared through the OS page
+cache rather than copied into every process.
+
+The snapshot is current if its catalog version matches the counter in
+StatCatalogVersion, which is one single-row query. The counter is bumped
+by the Stat save/delete signals and by load_wod20th_stats after it
+commits; Stat writes made through the ORM also remove the snapshot file
+outright. Writes that send no signals (QuerySet.update(), data
+migrations) must call `invalidate_snapshot` themselves.
+"""
+import json
+import mmap
+import os
+import struct
+
+from django.conf import settings
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Stat, StatCatalogVersion
+
+MAGIC = b"WODS"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sHIQ")
+INDEX_ENTRY = struct.Struct("<QQHI")
+KEY_FIELDS = ("game_line", "category", "stat_type")
+BODY_FIELDS = KEY_FIELDS + ("description", "values", "lock_string")
+
+
+class SnapshotError(Exception):
+    pass
+
+
+def snapshot_path():
+    return getattr(
+        settings,
+        "WOD20TH_STAT_SNAPSHOT",
+        os.path.join(settings.GAME_DIR, "server", "stat_catalog.snapshot"),
+    )
+
+
+def catalog_version():
+    """
+    The current value of the Stat catalog version counter.
+    """
+    version = StatCatalogVersion.objects.filter(pk=1).values_list("version", flat=True).first()
+    return version or 0
+
+
+def bump_catalog_version():
+    """
+    Mark every existing snapshot as stale.
+    """
+    if not StatCatalogVersion.objects.filter(pk=1).update(version=F("version") + 1):
+        StatCatalogVersion.objects.get_or_create(pk=1, defaults={"version": 1})
+
+
+def write_snapshot(path=None, stats=None):
+    """
+    Write all Stat rows to a snapshot file.
+
+    The file is written next to its target and renamed into place, so
+    readers never see a partial snapshot.
+
+    Returns:
+        int: Number of records written.
+    """
+    path = path or snapshot_path()
+    # read before the rows: a change committed in between bumps the
+    # counter past this version, so the snapshot is never too new for it
+    version = catalog_version()
+    if stats is None:
+        stats = Stat.objects.order_by("pk")
+
+    records = []
+    for stat in sorted(stats, key=lambda stat: (stat.name, stat.pk)):
+        name = stat.name.encode("utf-8")
+        body = json.dumps([getattr(stat, field) for field in BODY_FIELDS], separators=(",", ":")).encode("utf-8")
+        records.append((stat.pk, name, body))
+
+    offset = HEADER.size + INDEX_ENTRY.size * len(records)
+    index = []
+    for pk, name, body in records:
+        index.append(INDEX_ENTRY.pack(pk, offset, len(name), len(body)))
+        offset += len(name) + len(body)
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, FORMAT_VERSION, len(records), version))
+        file.writelines(index)
+        for _, name, body in records:
+            file.write(name)
+            file.write(body)
+    os.replace(tmp_path, path)
+    return len(records)
+
+
+def invalidate_snapshot(path=None):
+    """
+    Mark the snapshot as stale and remove the file, if any.
+    """
+    bump_catalog_version()
+    try:
+        os.remove(path or snapshot_path())
+    except FileNotFoundError:
+        pass
+
+
+class StatSnapshot:
+    """
+    Read-only, memory-mapped view of a snapshot file. Keep it open for as
+    long as records are read from it.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._map) < HEADER.size:
+            self.close()
+            raise SnapshotError(f"{path} is too short to be a stat snapshot")
+        magic, version, count, catalog_version = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            self.close()
+            raise SnapshotError(f"{path} is not a version {FORMAT_VERSION} stat snapshot")
+        self.count = count
+        self.version = catalog_version
+
+    def __len__(self):
+        return self.count
+
+    def _entry(self, index):
+        return INDEX_ENTRY.unpack_from(self._map, HEADER.size + INDEX_ENTRY.size * index)
+
+    def _name(self, index):
+        _, offset, name_length, _ = self._entry(index)
+        return self._map[offset:offset + name_length]
+
+    def record(self, index):
+        """
+        Decode the record at position `index` into a Stat that behaves
+        like one loaded from the database.
+        """
+        pk, offset, name_length, body_length = self._entry(index)
+        name = self._map[offset:offset + name_length].decode("utf-8")
+        body = json.loads(self._map[offset + name_length:offset + name_length + body_length])
+        stat = Stat(pk=pk, name=name, **dict(zip(BODY_FIELDS, body)))
+        stat._state.adding = False
+        stat._state.db = "default"
+        return stat
+
+    def find(self, name):
+        """
+        Decode the records called `name`, in pk order.
+        """
+        target = name.encode("utf-8")
+        # UTF-8 byte order is code point order, as the index was sorted
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self._name(middle) < target:
+                low = middle + 1
+            else:
+                high = middle
+        stats = []
+        while low < self.count and self._name(low) == target:
+            stats.append(self.record(low))
+            low += 1
+        return stats
+
+    def __iter__(self):
+        for index in range(self.count):
+            yield self.record(index)
+
+    def close(self):
+        self._map.close()
+
+
+def load_catalog_snapshot(path=None):
+    """
+    Attach the stat catalog to the snapshot if it is current.
+
+    Returns:
+        bool: True if the catalog is served from the snapshot, False if
+            it will fall back to loading from the database.
+    """
+    from .catalog import STAT_CATALOG
+
+    path = path or snapshot_path()
+    if not os.path.exists(path):
+        return False
+    try:
+        snapshot = StatSnapshot(path)
+    except (OSError, SnapshotError):
+        return False
+    if snapshot.version != catalog_version():
+        snapshot.close()
+        return False
+    STAT_CATALOG.attach(snapshot)
+    return True
+
+
+@receiver(post_save, sender=Stat, dispatch_uid="wod20th_stat_snapshot_save")
+@receiver(post_delete, sender=Stat, dispatch_uid="wod20th_stat_snapshot_delete")
+def _stat_changed(sender, instance, **kwargs):
+    invalidate_snapshot()
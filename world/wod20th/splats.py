@@ -0,0 +1,106 @@
+# world/wod20th/splats.py
+"""
+Splat and sub-group membership, mirrored into Evennia Tags.
+
+A character's splat (and clan, tribe or tradition) is kept in its db
+Attribute for the sheet and mirrored as a Tag in a category of the same
+name. Tags are indexed and cached per object, so membership checks and
+population queries such as "all Vampires in this room" or "count by
+splat" are single indexed queries instead of unpickling every
+character's Attributes.
+"""
+AFFILIATION_CATEGORIES = ("splat", "clan", "tribe", "tradition")
+
+
+def set_affiliation(character, category, value):
+    """
+    Set `category` (e.g. "splat" or "clan") on a character, keeping the
+    Attribute and the Tag in step. A value of None clears it.
+    """
+    if category not in AFFILIATION_CATEGORIES:
+        raise ValueError(f"Unknown category {category}.")
+    character.attributes.add(category, value)
+    character.tags.remove(category=category)
+    if value:
+        character.tags.add(value, category=category)
+
+
+def sync_affiliation_tags(character):
+    """
+    Add missing Tags for characters whose Attributes predate the Tags.
+    """
+    for category in AFFILIATION_CATEGORIES:
+        value = character.attributes.get(category)
+        if value and not character.tags.has(value, category=category):
+            character.tags.remove(category=category)
+            character.tags.add(value, category=category)
+
+
+def has_affiliation(character, value, category="splat"):
+    """
+    Whether the character has `value` in `category`. Characters whose
+    Tags haven't been backfilled yet (see `backfill_affiliation_tags`)
+    are checked against their Attribute instead.
+    """
+    if character.tags.has(value, category=category):
+        return True
+    if character.tags.get(category=category, return_list=True):
+        return False
+    stored = character.attributes.get(category)
+    return bool(stored) and str(stored).lower() == str(value).lower()
+
+
+def backfill_affiliation_tags():
+    """
+    Add the Tags for every object that has an affiliation Attribute,
+    e.g. NPCs and characters who haven't logged in since Tags were added.
+
+    Returns:
+        int: Number of objects checked.
+    """
+    from evennia.objects.models import ObjectDB
+
+    objs = ObjectDB.objects.filter(
+        db_attributes__db_key__in=AFFILIATION_CATEGORIES, db_attributes__db_category__isnull=True
+    ).distinct()
+    count = 0
+    for obj in objs:
+        sync_affiliation_tags(obj)
+        count += 1
+    return count
+
+
+def members(value, category="splat", location=None):
+    """
+    All objects tagged with `value` in `category`, optionally only those
+    in `location`.
+
+    Returns:
+        QuerySet: ObjectDB rows.
+    """
+    from evennia.objects.models import ObjectDB
+
+    queryset = ObjectDB.objects.filter(db_tags__db_key__iexact=value, db_tags__db_category=category)
+    if location is not None:
+        queryset = queryset.filter(db_location=location)
+    return queryset
+
+
+def census(category="splat", location=None):
+    """
+    Count members per value of `category` in one grouped query.
+
+    Returns:
+        list: (value, count) pairs, largest first.
+    """
+    from django.db.models import Count
+    from evennia.typeclasses.tags import Tag
+
+    queryset = Tag.objects.filter(db_category=category)
+    if location is not None:
+        queryset = queryset.filter(objectdb__db_location=location)
+    rows = queryset.values("db_key").annotate(count=Count("objectdb", distinct=True))
+    return sorted(
+        ((row["db_key"], row["count"]) for row in rows if row["count"]),
+        key=lambda pair: -pair[1],
+    )
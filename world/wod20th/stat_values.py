@@ -0,0 +1,112 @@
+# world/wod20th/stat_values.py
+"""
+Compiled representations of a Stat's allowed values.
+
+Most WoD stats allow a contiguous run of dots (0-5, 1-10), so a list of
+values is compiled once into a range check, falling back to a frozenset
+for irregular lists. Both support `value in compiled` in O(1).
+"""
+
+
+class ValueRange:
+    """
+    Allowed values forming an arithmetic progression from minimum to maximum.
+    """
+
+    __slots__ = ("minimum", "maximum", "step")
+
+    def __init__(self, minimum, maximum, step=1):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.step = step
+
+    def __contains__(self, value):
+        if not isinstance(value, int):
+            return False
+        return self.minimum <= value <= self.maximum and (value - self.minimum) % self.step == 0
+
+    def __iter__(self):
+        return iter(range(self.minimum, self.maximum + 1, self.step))
+
+    def __len__(self):
+        return (self.maximum - self.minimum) // self.step + 1
+
+    def __repr__(self):
+        return f"<ValueRange {self.minimum}-{self.maximum} step {self.step}>"
+
+
+class ValueSet:
+    """
+    Arbitrary allowed values.
+    """
+
+    __slots__ = ("values",)
+
+    def __init__(self, values):
+        try:
+            self.values = frozenset(values)
+        except TypeError:
+            # unhashable entries (e.g. nested lists) fall back to a linear scan
+            self.values = tuple(values)
+
+    def __contains__(self, value):
+        try:
+            return value in self.values
+        except TypeError:
+            return False
+
+    def __iter__(self):
+        return iter(self.values)
+
+    def __len__(self):
+        return len(self.values)
+
+    def __repr__(self):
+        return f"<ValueSet {sorted(self.values, key=repr)}>"
+
+
+def compile_values(values):
+    """
+    Compile a list of allowed values into the cheapest membership test.
+
+    Args:
+        values (list): The `Stat.values` list.
+
+    Returns:
+        ValueRange or ValueSet: Supports `in`, iteration and len().
+    """
+    values = values or []
+    if values and all(isinstance(v, int) and not isinstance(v, bool) for v in values):
+        ordered = sorted(set(values))
+        if len(ordered) == 1:
+            return ValueRange(ordered[0], ordered[0])
+        step = ordered[1] - ordered[0]
+        if all(b - a == step for a, b in zip(ordered, ordered[1:])):
+            return ValueRange(ordered[0], ordered[-1], step)
+    return ValueSet(values)
+
+
+def expand_values(spec):
+    """
+    Expand the compact range encoding used in import files.
+
+    A `values` entry may be written as `{"min": 0, "max": 5}` (optionally
+    with `"step"`) instead of an enumerated list.
+
+    Args:
+        spec (list or dict): Raw `values` entry from an import record.
+
+    Returns:
+        list: The enumerated values.
+
+    Raises:
+        ValueError: If the range description is malformed.
+    """
+    if not isinstance(spec, dict):
+        return spec
+    minimum, maximum, step = spec.get("min"), spec.get("max"), spec.get("step", 1)
+    if not all(isinstance(v, int) and not isinstance(v, bool) for v in (minimum, maximum, step)):
+        raise ValueError("range values need integer 'min', 'max' and optional 'step'")
+    if step <= 0 or maximum < minimum:
+        raise ValueError("range values need 'max' >= 'min' and a positive 'step'")
+    return list(range(minimum, maximum + 1, step))
@@ -1,28 +1,203 @@
 # utils/ansi_utils.py
-import textwrap
-from evennia.utils.ansi import strip_raw_ansi, ANSIString
+"""
+ANSI-aware text helpers.
 
+`wrap_ansi` wraps text containing Evennia color markup (|r, |[b, |500,
+|=a, |#ff0000 ...) or raw ANSI escapes in one pass over the text: markup
+tokens take no width, visible characters are counted as they are read,
+and the markup is kept as-is in the output. Colors that are active at a
+line break are closed at the end of the line and reopened at the start
+of the next, so each line renders correctly on its own.
+
+`header`, `divider` and `footer` return the banners used around room
+looks, sheets and listings. They are built once per (title, width, fill,
+color) and shared after that; see `fragment_cache_stats`.
+"""
+import re
+from functools import lru_cache
+
+from evennia.utils.ansi import ANSIString
+
+TAB_WIDTH = 4
+
+_CODE, _TEXT, _GLYPH = 0, 1, 2
+
+_TOKENS = re.compile(
+    r"(?P<glyph>\|\||\|_)"
+    r"|(?P<brk>\r?\n|\|/)"
+    r"|(?P<space>[ ]+|\t|\|-|\|>)"
+    r"|(?P<reset>\|n|\x1b\[0?m)"
+    r"|(?P<code>\|\[?(?:[0-5]{3}|=[a-z]|#[0-9a-fA-F]{6}|[a-zA-Z*^])|\x1b\[[0-9;]*m)"
+    r"|(?P<text>[^\s|\x1b]+|.)",
+    re.S,
+)
+
+
+@lru_cache(maxsize=1024)
 def wrap_ansi(text, width):
     """
     Wraps a string to the specified width, preserving ANSI codes.
 
+    Runs of spaces inside a line are kept, whitespace at a wrap point is
+    dropped, newlines (or |/) start a new line and words longer than
+    `width` are split. Results are cached on (text, width).
+
     Args:
         text (str): The text to wrap.
         width (int): The width to wrap the text to.
 
     Returns:
-        str: The wrapped text.
+        str: The wrapped text, with its markup.
+
+    Raises:
+        ValueError: If `width` is not positive.
     """
-    text = ANSIString(text)
-    raw_text = strip_raw_ansi(text)
-    wrapped_lines = textwrap.wrap(raw_text, width=width)
+    if width <= 0:
+        raise ValueError(f"invalid width {width!r} (must be > 0)")
+    lines = []
+    line = []
+    line_width = 0
+    space = []
+    space_width = 0
+    word = []
+    word_width = 0
+    active = []
+
+    def end_line():
+        nonlocal line, line_width
+        if active:
+            line.append("|n")
+        lines.append("".join(line))
+        line = list(active)
+        line_width = 0
+
+    def place(pieces):
+        nonlocal line_width
+        for kind, piece in pieces:
+            if kind == _CODE:
+                if piece == "|n" or piece in ("\x1b[m", "\x1b[0m"):
+                    active.clear()
+                elif piece not in active:
+                    active.append(piece)
+                line.append(piece)
+                continue
+            if kind == _GLYPH:
+                if line_width >= width:
+                    end_line()
+                line.append(piece)
+                line_width += 1
+                continue
+            start = 0
+            while start < len(piece):
+                if line_width >= width:
+                    end_line()
+                room = width - line_width
+                line.append(piece[start:start + room])
+                line_width += min(room, len(piece) - start)
+                start += room
+
+    def commit_word():
+        nonlocal word, word_width, space, space_width
+        if not word:
+            return
+        if line_width + space_width + word_width > width and line_width:
+            if word_width <= width or line_width + space_width >= width:
+                end_line()
+                space = []
+        elif not line_width and space_width + word_width > width:
+            # indentation that doesn't fit is dropped
+            space = []
+        if space:
+            place([(_TEXT, piece) for piece in space])
+        place(word)
+        word, word_width = [], 0
+        space, space_width = [], 0
+
+    for match in _TOKENS.finditer(text):
+        kind = match.lastgroup
+        token = match.group()
+        if kind == "text":
+            word.append((_TEXT, token))
+            word_width += len(token)
+        elif kind == "code" or kind == "reset":
+            word.append((_CODE, token))
+        elif kind == "space":
+            commit_word()
+            space.append(token if token[0] == " " else " " * TAB_WIDTH)
+            space_width += len(space[-1])
+        elif kind == "glyph":
+            word.append((_GLYPH, token))
+            word_width += 1
+        else:
+            commit_word()
+            space, space_width = [], 0
+            end_line()
+    commit_word()
+    if line_width or len(line) > len(active):
+        end_line()
+
+    while lines and not lines[-1].strip():
+        lines.pop()
+    return "\n".join(lines).lstrip("\n")
+
+
+# cached UI fragments
+
+# titles include room names, so cap the cache rather than let renames pile up
+MAX_FRAGMENTS = 4096
+_FRAGMENTS = {}
+FRAGMENT_STATS = {"hits": 0, "misses": 0}
+
+
+def _fragment(title, width, fill, color):
+    key = (title, width, fill, color)
+    fragment = _FRAGMENTS.get(key)
+    if fragment is not None:
+        FRAGMENT_STATS["hits"] += 1
+        return fragment
+    FRAGMENT_STATS["misses"] += 1
+    if title:
+        fragment = ANSIString.center(ANSIString(title), width=width, fillchar=ANSIString(f"{color}{fill}|n"))
+    else:
+        fragment = ANSIString(f"{color}{fill * width}|n")
+    if len(_FRAGMENTS) >= MAX_FRAGMENTS:
+        _FRAGMENTS.clear()
+    _FRAGMENTS[key] = fragment
+    return fragment
 
-    current_index = 0
-    wrapped_text = ""
-    for line in wrapped_lines:
-        visible_length = len(line)
-        ansi_part = text[current_index:current_index + visible_length]
-        current_index += visible_length
-        wrapped_text += str(ansi_part) + "\n"
 
-    return wrapped_text.strip()
+def header(title, width=78, fill="=", color="|b"):
+    """
+    `title` centered in a line of `fill`, e.g. header("|y Characters |n").
+
+    Args:
+        title (str): Title markup, including its own color.
+        width (int): Visible width.
+        fill (str): Fill character.
+        color (str): Markup for the fill.
+
+    Returns:
+        ANSIString: The parsed banner, shared between callers.
+    """
+    return _fragment(title, width, fill, color)
+
+
+def divider(width=78, fill="=", color="|b"):
+    """
+    A full-width line of `fill`. See `header`.
+    """
+    return _fragment("", width, fill, color)
+
+
+def footer(title="", width=78, fill="=", color="|b"):
+    """
+    A closing line: a divider, or a header if `title` is given.
+    """
+    return _fragment(title, width, fill, color)
+
+
+def fragment_cache_stats():
+    """
+    Hits, misses and size of the fragment cache.
+    """
+    return dict(FRAGMENT_STATS, size=len(_FRAGMENTS))
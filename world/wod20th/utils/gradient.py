@@ -0,0 +1,236 @@
+# utils/gradient.py
+"""
+Color gradients over text, rendered for what the client can show.
+
+A gradient is stored as data, `{"text": "Name", "stops": [(r, g, b), ...]}`,
+and rendered on demand in one of four modes:
+
+    truecolor  24-bit escapes, one exact color per letter
+    xterm256   Evennia |rgb markup (downgraded by Evennia if needed)
+    ansi16     the nearest of the 16 basic colors
+    plain      no color, for screenreaders and clients without ANSI
+
+`client_mode` picks the mode from a session's protocol flags.
+
+Nearest xterm256 colors come from lookup tables built at import: one
+per-channel table for the 6x6x6 cube and one for the 24-step grayscale
+ramp, so each lookup compares just two candidates. Renders are memoized
+on (text, stops, mode), so the same gradient over the same text (a name,
+a channel prefix, a header) is only computed once:
+
+    gradient_text("Camarilla", "crimson", "gold")
+"""
+import re
+from functools import lru_cache
+
+MODES = ("truecolor", "xterm256", "ansi16", "plain")
+
+# Evennia markup for the 16 basic colors (lowercase is the bright half)
+ANSI16_COLORS = (
+    ("|X", (0, 0, 0)), ("|R", (128, 0, 0)), ("|G", (0, 128, 0)), ("|Y", (128, 128, 0)),
+    ("|B", (0, 0, 128)), ("|M", (128, 0, 128)), ("|C", (0, 128, 128)), ("|W", (192, 192, 192)),
+    ("|x", (128, 128, 128)), ("|r", (255, 0, 0)), ("|g", (0, 255, 0)), ("|y", (255, 255, 0)),
+    ("|b", (0, 0, 255)), ("|m", (255, 0, 255)), ("|c", (0, 255, 255)), ("|w", (255, 255, 255)),
+)
+
+
+COLOR_MAP = {
+    "black": (0, 0, 0),
+    "red": (255, 0, 0),
+    "green": (0, 255, 0),
+    "yellow": (255, 255, 0),
+    "blue": (0, 0, 255),
+    "magenta": (255, 0, 255),
+    "cyan": (0, 255, 255),
+    "white": (255, 255, 255),
+    "gray": (128, 128, 128),
+    "maroon": (128, 0, 0),
+    "olive": (128, 128, 0),
+    "navy": (0, 0, 128),
+    "purple": (128, 0, 128),
+    "teal": (0, 128, 128),
+    "silver": (192, 192, 192),
+    "lime": (0, 255, 0),
+    "aqua": (0, 255, 255),
+    "fuchsia": (255, 0, 255),
+    "orange": (255, 165, 0),
+    "pink": (255, 192, 203),
+    "gold": (255, 215, 0),
+    "crimson": (220, 20, 60),
+    "violet": (238, 130, 238),
+    "indigo": (75, 0, 130),
+    "turquoise": (64, 224, 208),
+    "coral": (255, 127, 80),
+    "salmon": (250, 128, 114),
+    "skyblue": (135, 206, 235),
+    "khaki": (240, 230, 140),
+    "plum": (221, 160, 221),
+}
+
+# xterm's color cube levels and grayscale ramp (colors 232-255)
+CUBE_LEVELS = (0, 95, 135, 175, 215, 255)
+GRAY_LEVELS = tuple(8 + 10 * step for step in range(24))
+
+
+def _nearest(levels, value):
+    return min(range(len(levels)), key=lambda index: abs(levels[index] - value))
+
+
+# channel value (0-255) -> index of the nearest cube level, and
+# r + g + b (0-765) -> index of the gray step nearest to their mean
+_CUBE_INDEX = tuple(_nearest(CUBE_LEVELS, value) for value in range(256))
+_GRAY_INDEX = tuple(_nearest(GRAY_LEVELS, total / 3) for total in range(766))
+
+# RGB of every xterm256 color above the 16 basic ones
+XTERM_PALETTE = {
+    16 + 36 * r + 6 * g + b: (CUBE_LEVELS[r], CUBE_LEVELS[g], CUBE_LEVELS[b])
+    for r in range(6) for g in range(6) for b in range(6)
+}
+XTERM_PALETTE.update({232 + step: (level,) * 3 for step, level in enumerate(GRAY_LEVELS)})
+
+
+def parse_color(color):
+    """
+    A color name from COLOR_MAP, a #RRGGBB hex code or an (r, g, b)
+    tuple as an (r, g, b) tuple, or None if it isn't one.
+    """
+    if isinstance(color, (tuple, list)):
+        return tuple(color) if len(color) == 3 and all(0 <= c <= 255 for c in color) else None
+    match = re.match(r"^#([0-9A-Fa-f]{6})$", color)
+    if match:
+        hex_color = match.group(1)
+        return tuple(int(hex_color[i:i + 2], 16) for i in (0, 2, 4))
+    return COLOR_MAP.get(color.lower())
+
+
+def client_mode(obj):
+    """
+    The best gradient mode for an object's (first) session. Objects
+    without a session get "xterm256", which Evennia downgrades per
+    client when the text is sent.
+    """
+    sessions = obj.sessions.all() if hasattr(obj, "sessions") else []
+    if not sessions:
+        return "xterm256"
+    flags = sessions[0].protocol_flags
+    if flags.get("SCREENREADER") or not flags.get("ANSI", True):
+        return "plain"
+    if flags.get("TRUECOLOR"):
+        return "truecolor"
+    if flags.get("XTERM256"):
+        return "xterm256"
+    return "ansi16"
+
+
+def interpolate(text, stops):
+    """
+    The color of each letter of `text`, spread evenly over `stops`.
+
+    Returns:
+        list: (char, (r, g, b)) pairs.
+    """
+    stops = [tuple(stop) for stop in stops]
+    if len(stops) == 1:
+        return [(char, stops[0]) for char in text]
+    steps = max(len(text) - 1, 1)
+    segments = len(stops) - 1
+    colors = []
+    for i, char in enumerate(text):
+        position = i * segments / steps
+        segment = min(int(position), segments - 1)
+        start, end = stops[segment], stops[segment + 1]
+        fraction = position - segment
+        colors.append((char, tuple(int(a + (b - a) * fraction) for a, b in zip(start, end))))
+    return colors
+
+
+def _distance(rgb, other):
+    return sum((a - b) ** 2 for a, b in zip(rgb, other))
+
+
+@lru_cache(maxsize=4096)
+def rgb_to_xterm256(r, g, b):
+    """
+    The xterm256 color (16-255) nearest to an RGB value.
+    """
+    cube = 16 + 36 * _CUBE_INDEX[r] + 6 * _CUBE_INDEX[g] + _CUBE_INDEX[b]
+    gray = 232 + _GRAY_INDEX[r + g + b]
+    if _distance((r, g, b), XTERM_PALETTE[gray]) < _distance((r, g, b), XTERM_PALETTE[cube]):
+        return gray
+    return cube
+
+
+@lru_cache(maxsize=4096)
+def xterm256_markup(r, g, b):
+    """
+    Evennia markup for the xterm256 color nearest to an RGB value:
+    |rgb for the cube, |=b to |=y for the grayscale ramp.
+    """
+    color = rgb_to_xterm256(r, g, b)
+    if color >= 232:
+        return f"|={chr(ord('b') + color - 232)}"
+    color -= 16
+    return f"|{color // 36}{color // 6 % 6}{color % 6}"
+
+
+@lru_cache(maxsize=4096)
+def rgb_to_ansi16(rgb):
+    return min(ANSI16_COLORS, key=lambda color: _distance(rgb, color[1]))[0]
+
+
+def _escape(char):
+    return "||" if char == "|" else char
+
+
+def render(text, stops, mode="xterm256"):
+    """
+    Render `text` with a gradient over `stops` for one of MODES.
+    Results are memoized.
+
+    Args:
+        text (str): Any text; letters are colored one by one.
+        stops (list): (r, g, b) tuples, at least one.
+        mode (str): One of MODES.
+
+    Returns:
+        str: The colored text, ending with a color reset.
+    """
+    return _render(text, tuple(tuple(stop) for stop in stops), mode)
+
+
+def gradient_text(text, *colors, mode="xterm256"):
+    """
+    Render `text` with a gradient over colors given by name, #RRGGBB or
+    (r, g, b), e.g. gradient_text("Anarchs", "red", "#FFD700").
+
+    Raises:
+        ValueError: If a color can't be parsed.
+    """
+    stops = []
+    for color in colors:
+        rgb = parse_color(color)
+        if rgb is None:
+            raise ValueError(f"Invalid color {color!r}.")
+        stops.append(rgb)
+    return render(text, stops, mode)
+
+
+@lru_cache(maxsize=1024)
+def _render(text, stops, mode):
+    if mode == "plain" or not stops:
+        return text.replace("|", "||")
+    parts = []
+    last = None
+    for char, (r, g, b) in interpolate(text, stops):
+        if mode == "truecolor":
+            parts.append(f"\033[38;2;{r};{g};{b}m{_escape(char)}")
+            continue
+        if mode == "ansi16":
+            code = rgb_to_ansi16((r, g, b))
+        else:
+            code = xterm256_markup(r, g, b)
+        # consecutive letters of the same color share one code
+        parts.append(_escape(char) if code == last else code + _escape(char))
+        last = code
+    parts.append("\033[0m" if mode == "truecolor" else "|n")
+    return "".join(parts)
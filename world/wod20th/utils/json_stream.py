@@ -0,0 +1,125 @@
+# world/wod20th/utils/json_stream.py
+"""
+Incremental readers for large JSON and JSONL files.
+
+Both readers yield one decoded record at a time so callers can process
+files of any size in constant memory.
+"""
+import json
+from itertools import islice
+
+_DECODER = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+# what may follow a complete array item
+_ITEM_END = _WHITESPACE + ",]"
+CHUNK_SIZE = 64 * 1024
+
+
+def _skip_whitespace(buf, pos):
+    while pos < len(buf) and buf[pos] in _WHITESPACE:
+        pos += 1
+    return pos
+
+
+def iter_json_array(file, chunk_size=CHUNK_SIZE):
+    """
+    Yield the items of a top-level JSON array without loading the whole
+    document.
+
+    Args:
+        file (file): A text-mode file object positioned at the array.
+        chunk_size (int): Number of characters read per refill.
+
+    Raises:
+        json.JSONDecodeError: If the document is not a well-formed array.
+    """
+    buf = ""
+    pos = 0
+    eof = False
+
+    def refill():
+        nonlocal buf, pos, eof
+        chunk = file.read(chunk_size)
+        if not chunk:
+            eof = True
+        # drop what has been consumed so the buffer never holds more
+        # than the current item plus one chunk
+        buf = buf[pos:] + chunk
+        pos = 0
+
+    while True:
+        pos = _skip_whitespace(buf, pos)
+        if pos < len(buf) or eof:
+            break
+        refill()
+    if pos >= len(buf) or buf[pos] != "[":
+        raise json.JSONDecodeError("Expecting '[' at start of document", buf, pos)
+    pos += 1
+
+    expect_item = True
+    count = 0
+    while True:
+        pos = _skip_whitespace(buf, pos)
+        if pos >= len(buf):
+            if eof:
+                raise json.JSONDecodeError("Unterminated array", buf, pos)
+            refill()
+            continue
+
+        char = buf[pos]
+        if char == "]":
+            if expect_item and count:
+                raise json.JSONDecodeError("Expecting value after ','", buf, pos)
+            return
+        if not expect_item:
+            if char != ",":
+                raise json.JSONDecodeError("Expecting ',' delimiter", buf, pos)
+            pos += 1
+            expect_item = True
+            continue
+
+        try:
+            item, end = _DECODER.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            refill()
+            continue
+        if not eof and (end >= len(buf) or buf[end] not in _ITEM_END):
+            # a scalar may have been cut off at the chunk boundary, possibly
+            # leaving a valid prefix such as "1" of "1.25"
+            refill()
+            continue
+        pos = end
+        expect_item = False
+        count += 1
+        yield item
+
+
+def iter_jsonl(file):
+    """
+    Yield one decoded record per non-blank line of a JSON Lines file.
+
+    Raises:
+        json.JSONDecodeError: With the failing line number in the message.
+    """
+    for lineno, line in enumerate(file, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as e:
+            raise json.JSONDecodeError(f"{e.msg} (line {lineno})", e.doc, e.pos) from e
+
+
+def batched(iterable, size):
+    """
+    Yield lists of up to `size` items from `iterable`.
+    """
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
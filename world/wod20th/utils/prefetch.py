@@ -0,0 +1,59 @@
+# utils/prefetch.py
+"""
+Batched Attribute loading.
+
+Reading `obj.db.<key>` on an object whose Attribute cache is cold costs
+one query per object and key. Before rendering something that reads the
+same Attributes off many objects (such as a room look), call
+`prefetch_attributes` to load them all in one query and seed each
+object's Attribute cache, including "not set" entries, so the reads
+that follow are served from memory.
+"""
+
+
+def _cachekey(key, category):
+    # same format as evennia's attribute backend uses
+    return f"{key}-{category}"
+
+
+def prefetch_attributes(objs, keys, category=None):
+    """
+    Load the Attributes `keys` for all of `objs` with one query.
+
+    Objects whose cache already holds every key are skipped, so a warm
+    room costs no queries at all.
+
+    Args:
+        objs (iterable): Typeclassed objects.
+        keys (iterable of str): Attribute keys, e.g. ("shortdesc",).
+        category (str, optional): Attribute category.
+
+    Returns:
+        int: How many objects had to be loaded.
+    """
+    from evennia.objects.models import ObjectDB
+
+    keys = [key.strip().lower() for key in keys]
+    category = category.strip().lower() if category else None
+    cold = [
+        obj for obj in objs
+        if any(_cachekey(key, category) not in obj.attributes.backend._cache for key in keys)
+    ]
+    if not cold:
+        return 0
+
+    rows = ObjectDB.db_attributes.through.objects.filter(
+        objectdb_id__in=[obj.id for obj in cold], attribute__db_key__in=keys
+    ).select_related("attribute")
+    if category is None:
+        rows = rows.filter(attribute__db_category__isnull=True)
+    else:
+        rows = rows.filter(attribute__db_category=category)
+    found = {(row.objectdb_id, row.attribute.db_key.lower()): row.attribute for row in rows}
+
+    for obj in cold:
+        backend = obj.attributes.backend
+        for key in keys:
+            # None records the Attribute as not set
+            backend._setcache(key, category, found.get((obj.id, key)))
+    return len(cold)